@@ -1,18 +1,29 @@
 import os
 import time
-import threading
 import tkinter as tk
 from tkinter import ttk, filedialog
 from pathlib import Path
+from virtual_list import VirtualFileList
+from scanner import ScanWorker
+from records import FileTable
 
 class FileMonitorApp:
+    DRAIN_INTERVAL_MS = 100  # How often the GUI pulls scan results from the worker
+    MAX_BATCHES_PER_DRAIN = 10  # Upper bound on work done per drain so the UI stays responsive
+    RESORT_INTERVAL = 1.0  # Minimum seconds between re-sorts of a list sorted by a column heading
+    SCAN_THREADS = 8  # Parallel listing/stat calls per scan; hides round trips on network shares
+
     def __init__(self, root):
         self.root = root
         self.root.title("File Monitor")
         
         self.folder_path = tk.StringVar()
         self.interval = tk.IntVar(value=10)
-        self.files_info = {}
+        self.scan_threads = tk.IntVar(value=self.SCAN_THREADS)  # 1 scans serially
+        self.files_info = FileTable()
+        self.worker = None  # Background scanner feeding files_info through a queue
+        self.list_dirty = False  # files_info changed since a column-sorted list was last sorted
+        self.last_resort = 0
         
         self.create_widgets()
 
@@ -30,19 +41,30 @@ class FileMonitorApp:
         
         self.always_on_top = tk.BooleanVar()
         ttk.Checkbutton(frame, text="Always on Top", variable=self.always_on_top, command=self.toggle_always_on_top).grid(row=1, column=2, sticky='w')
+
+        ttk.Label(frame, text="Scan Threads:").grid(row=2, column=0, sticky='w')
+        ttk.Entry(frame, textvariable=self.scan_threads, width=10).grid(row=2, column=1, sticky='w')
         
         tree_frame = ttk.Frame(self.root)
         tree_frame.pack(padx=10, pady=10, fill='both', expand=True)
         
-        self.tree = ttk.Treeview(tree_frame, columns=("name", "size", "status"), show="headings")
-        self.tree.heading("name", text="Name")
-        self.tree.heading("size", text="Size (bytes)")
-        self.tree.heading("status", text="Status")
-        self.tree.pack(side="left", fill='both', expand=True)
+        # Only the visible rows are materialized, the rest stay in files_info
+        self.tree = VirtualFileList(
+            tree_frame,
+            columns=("name", "size", "status"),
+            headings=("Name", "Size (bytes)", "Status"),
+            row_values=self.file_row_values,
+            sort_keys={
+                "name": lambda path: os.path.basename(path).lower(),
+                "size": lambda path: self.files_info.get(path, (0, 0))[0],
+                "status": lambda path: self.files_info.get(path, (0, 0))[1],
+            }
+        )
+        self.tree.pack(fill='both', expand=True)
 
-        self.tree_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=self.tree_scroll.set)
-        self.tree_scroll.pack(side="right", fill="y")
+        # Style tags for coloring the status rows
+        self.tree.tag_configure('checking', background='yellow', font=('Helvetica', 10, 'bold'), foreground='black')
+        self.tree.tag_configure('finished', background='green', font=('Helvetica', 10, 'bold'), foreground='black')
 
     def browse_folder(self):
         folder_selected = filedialog.askdirectory()
@@ -55,68 +77,48 @@ class FileMonitorApp:
             print("Invalid folder path")
             return
         
-        self.monitoring = True
-        threading.Thread(target=self.monitor_folder, args=(folder,), daemon=True).start()
+        # Replace any previous scan with one for the selected folder
+        if self.worker:
+            self.worker.stop()
+        else:
+            self.root.after(self.DRAIN_INTERVAL_MS, self.process_updates)
+        self.files_info = FileTable()
+        self.update_treeview()
+        self.worker = ScanWorker(folder, self.interval.get(), workers=self.scan_threads.get())
+        self.worker.start()
+
+    def process_updates(self):
+        # Runs on the Tk thread; applies a bounded number of scan batches per call
+        try:
+            self.worker.interval = self.interval.get()
+        except tk.TclError:
+            pass  # Keep the previous interval while the entry is being edited
 
-    def monitor_folder(self, folder):
-        while self.monitoring:
-            self.update_files_info(folder)
+        _, changed = self.worker.apply_updates(self.files_info, self.MAX_BATCHES_PER_DRAIN)
+        # files_info keeps its time order as batches are applied, so the default view only needs a
+        # redraw; a list sorted by a column heading is a copy and is re-sorted now and then
+        self.list_dirty = (self.list_dirty or changed) and self.tree.sort_column is not None
+        if self.list_dirty and time.monotonic() - self.last_resort >= self.RESORT_INTERVAL:
             self.update_treeview()
-            time.sleep(self.interval.get())
+            self.list_dirty = False
+            self.last_resort = time.monotonic()
+        else:
+            self.tree.refresh()  # Statuses still age even when no files changed
+        self.root.after(self.DRAIN_INTERVAL_MS, self.process_updates)
 
-    def update_files_info(self, folder):
-        current_files_info = {}
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    size = os.path.getsize(file_path)
-                except OSError:
-                    size = 0
-                
-                if file_path in self.files_info:
-                    last_size, last_change_time = self.files_info[file_path]
-                    if size != last_size:
-                        current_files_info[file_path] = (size, time.time())
-                    else:
-                        current_files_info[file_path] = (last_size, last_change_time)
-                else:
-                    current_files_info[file_path] = (size, time.time())
-        
-        self.files_info = current_files_info
+    def file_row_values(self, file_path):
+        # A column-sorted list is re-sorted at most once per RESORT_INTERVAL, so a row can briefly outlive its file
+        size, last_change_time = self.files_info.get(file_path, (0, 0))
+        if time.time() - last_change_time > 10:
+            return (os.path.basename(file_path), size, "Finished"), 'finished'
+        return (os.path.basename(file_path), size, "Checking..."), 'checking'
 
     def update_treeview(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        sorted_files = sorted(self.files_info.items(), key=lambda x: x[1][1], reverse=True)
-        
-        for file_path, (size, last_change_time) in sorted_files:
-            file_name = os.path.basename(file_path)
-            if time.time() - last_change_time > 10:
-                status = "Finished"
-                tags = ('finished',)
-            else:
-                status = "Checking..."
-                tags = ('checking',)
-            
-            self.tree.insert("", "end", values=(file_name, size, status), tags=tags)
-        
-        # Scroll to the top to show the latest files
-        if len(sorted_files) > 0:
-            self.tree.yview_moveto(0)
+        # Newest first: the table's time-ordered paths shown back to front
+        self.tree.set_items(self.files_info.ordered_paths(), reverse=True)
 
-        # Style tags for coloring only in the status column
-        self.tree.tag_configure('checking', font=('Helvetica', 10), foreground='black')
-        self.tree.tag_configure('finished', font=('Helvetica', 10), foreground='black')
-        for item in self.tree.get_children():
-            status = self.tree.item(item, "values")[2]
-            if status == "Checking...":
-                self.tree.item(item, tags=('checking',))
-                self.tree.tag_configure('checking', background='yellow', font=('Helvetica', 10, 'bold'), foreground='black')
-            elif status == "Finished":
-                self.tree.item(item, tags=('finished',))
-                self.tree.tag_configure('finished', background='green', font=('Helvetica', 10, 'bold'), foreground='black')
+        # Scroll to the top to show the latest files
+        self.tree.scroll_to(0)
 
     def toggle_always_on_top(self):
         self.root.attributes("-topmost", self.always_on_top.get())
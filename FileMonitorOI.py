@@ -1,19 +1,26 @@
-import os
-import tkinter as tk
-from tkinter import messagebox, filedialog
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from watchdog.observers.polling import PollingObserver
+import queue
+import re
 import threading
 import time
-import json
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import messagebox, filedialog, simpledialog, ttk
 from datetime import datetime
+from dashboard import AlarmDashboard, alarm_title
+from engine import MonitorEngine, folders_from_glob, read_manifest, read_setup, write_setup
+from filters import PathFilter, parse_patterns
+from stability import StabilityPolicy
+from history import format_entry
+from sharding import ShardedEngine
 
 
-SETUP_FILE = "setup.json"  # Define the file name for storing setup
+HISTORY_PAGE_SIZE = 200  # History entries loaded per page in the history window
+ALARM_REPAINT_INTERVAL_MS = 100  # Alarm popups are repainted at most 10 times per second
+RESIZE_REDRAW_DELAY_MS = 30  # Popup text is redrawn at most once per this delay while resizing
+MAX_POPUPS = 20  # With more active alarms than this at startup, the dashboard replaces the popups
 
 class FileMonitorApp:
-    def __init__(self, root):
+    def __init__(self, root, workers=0):
         self.root = root
         self.root.title("FileMonitorOI")
         self.root.geometry("400x300")
@@ -28,116 +35,355 @@ class FileMonitorApp:
         self.save_button = tk.Button(root, text="Save Setup", command=self.save_setup)
         self.save_button.pack(pady=10)
 
+        self.dashboard_button = tk.Button(root, text="Dashboard", command=self.open_dashboard)
+        self.dashboard_button.pack(pady=10)
+
+        # One floating popup per alarm, or only the dashboard
+        self.use_popups = tk.BooleanVar(value=True)
+        tk.Checkbutton(root, text="Popup per Alarm", variable=self.use_popups, command=self.toggle_popups).pack()
+
+        # Raw vs coalesced filesystem event counters
+        self.events_label = tk.Label(root, text="")
+        self.events_label.pack(side="bottom", pady=5)
+
         # Variables to store alarms and file history
         self.folder_to_watch = None
-        self.alarms = []  # List to store alarms
-        self.file_history = []  # Stores file history (filename, timestamp, file size)
+        self.alarms = {}  # Alarm registry: alarm id -> alarm, in the order they were added
         self.config_window_open = False  # Track if config window is open
         self.config_window = None  # Track the actual config window instance
-
-        # Load setup if available
+        # Watches folders without touching Tk; with workers, in that many separate processes
+        if workers:
+            self.engine = ShardedEngine(workers, on_state_change=self.on_alarm_state)
+        else:
+            self.engine = MonitorEngine(on_state_change=self.on_alarm_state)
+        self.state_lock = threading.Lock()
+        self.dirty_alarms = {}  # alarm id -> (alarm, file_name, changing) reported since the last repaint
+        self.state_reports = 0  # State changes reported by the engine
+        self.repaints = 0  # Popup repaints actually done
+        self.fonts = {}  # Font size -> cached tkfont.Font used for alarm text
+        self.alarm_states = {}  # alarm id -> (file name, status); what the dashboard and popups show
+        self.dashboard = None  # AlarmDashboard while it is open
+        self.file_history = self.engine.file_history  # Stores file history (filename, timestamp, file size)
+        self.setup_updates = queue.Queue()  # Alarms loaded and started by the setup loader and starter threads
+        self.starting_alarms = set()  # Ids of alarms a background thread is still starting
+        self.saved_setup = None  # Setup as last read or written; None until loaded or if it could not be read
+
+        # Load setup if available, in the background so the window shows right away
         self.load_setup()
+        self.update_event_counts()
+        self.paint_dirty_alarms()
 
         # Ensure proper shutdown when the window is closed
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def open_config_window(self):
         if self.config_window_open and self.config_window is not None:
-            self.config_window.destroy()  # Close any existing config window
+            self.config_window.lift()  # Already open and kept up to date
+            return
 
         # Open a new window to display and configure alarms
         self.config_window_open = True
         self.config_window = tk.Toplevel(self.root)
         self.config_window.title("Configure Alarms")
-        self.config_window.geometry("400x300")
+        self.config_window.geometry("600x400")
         self.config_window.protocol("WM_DELETE_WINDOW", lambda: self.close_config_window(self.config_window))
 
-        # Create a container frame to hold the alarms
-        alarm_frame = tk.Frame(self.config_window)
-        alarm_frame.pack(fill="both", expand=True)
-
-        # If there are no alarms, display a message and the "Add Alarm" button
-        if not self.alarms:
-            no_alarm_label = tk.Label(alarm_frame, text="No alarms configured.")
-            no_alarm_label.pack(pady=10)
-
-        # Display existing alarms in rows (stack vertically)
-        for i, alarm in enumerate(self.alarms):
-            alarm_row = tk.Frame(alarm_frame)  # Create a frame for each alarm row
-            alarm_row.pack(fill="x", pady=5)  # Stack vertically
-
-            # Checkbox (ticker) to toggle the alarm on/off
-            alarm_checkbox = tk.Checkbutton(
-                alarm_row,
-                text="On/Off",
-                variable=alarm["active"],
-                command=lambda idx=i: self.toggle_alarm(idx)
-            )
-            alarm_checkbox.pack(side="left", padx=5)
-
-            # Delete Button
-            delete_button = tk.Button(
-                alarm_row,
-                text="Delete",
-                command=lambda idx=i: self.delete_alarm(idx)
-            )
-            delete_button.pack(side="left", padx=5)
-
-            # Alarm Label
-            alarm_label = tk.Label(alarm_row, text=f"{alarm['folder']}")
-            alarm_label.pack(side="left", padx=5)
-
-        # Add Alarm button at the bottom of the window to add new alarms
-        add_alarm_button = tk.Button(alarm_frame, text="Add Alarm", command=self.add_alarm)
-        add_alarm_button.pack(pady=10)
-
-    def delete_alarm(self, alarm_index):
-        """Delete an alarm and refresh the config window."""
-        alarm = self.alarms[alarm_index]
-        self.stop_monitoring(alarm)
-        del self.alarms[alarm_index]  # Remove the alarm from the list
-        self.open_config_window()  # Refresh the config window
+        # Buttons act on the selected rows, so enabling or deleting many alarms is one pass
+        button_frame = tk.Frame(self.config_window)
+        button_frame.pack(side="bottom", fill="x")
+        tk.Button(button_frame, text="Add Alarm", command=self.add_alarm).pack(side="left", padx=5, pady=5)
+        tk.Button(button_frame, text="Import", command=self.import_alarms).pack(side="left", padx=5, pady=5)
+        tk.Button(button_frame, text="On/Off", command=self.toggle_selected_alarms).pack(side="left", padx=5, pady=5)
+        tk.Button(button_frame, text="Delete", command=lambda: self.delete_alarms(self.selected_alarm_ids())).pack(side="left", padx=5, pady=5)
+        tk.Button(button_frame, text="Filters", command=lambda: self.edit_selected(self.edit_filters)).pack(side="left", padx=5, pady=5)
+        tk.Button(button_frame, text="Stability", command=lambda: self.edit_selected(self.edit_stability)).pack(side="left", padx=5, pady=5)
+
+        # One Treeview row per alarm, keyed by the alarm's stable id
+        self.config_tree = ttk.Treeview(self.config_window, columns=("active", "folder", "backend", "startup"), show="headings")
+        self.config_tree.heading("active", text="On/Off")
+        self.config_tree.heading("folder", text="Folder")
+        self.config_tree.heading("backend", text="Backend")
+        self.config_tree.heading("startup", text="Start (ms)")
+        self.config_tree.column("active", width=60, stretch=False)
+        self.config_tree.column("backend", width=80, stretch=False)
+        self.config_tree.column("startup", width=80, stretch=False, anchor="e")
+        scrollbar = ttk.Scrollbar(self.config_window, orient="vertical", command=self.config_tree.yview)
+        self.config_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.config_tree.pack(fill="both", expand=True)
+        self.config_tree.bind("<Double-1>", lambda event: self.toggle_selected_alarms())
+
+        self.insert_config_rows(self.alarms.values())
+
+    def config_row_values(self, alarm):
+        startup = "" if alarm["startup_time"] is None else f"{alarm['startup_time'] * 1000:.1f}"
+        backend = alarm["backend"]
+        if alarm["running_backend"] not in (None, backend):
+            backend = f"{alarm['running_backend']} ({backend} failed)"
+        return ("On" if alarm["active"].get() else "Off", alarm["folder"], backend, startup)
+
+    def insert_config_rows(self, alarms):
+        if self.config_window_open:
+            for alarm in alarms:
+                self.config_tree.insert("", "end", iid=str(alarm["id"]), values=self.config_row_values(alarm))
+
+    def update_config_rows(self, alarms):
+        # Only rewrite the rows of the alarms that changed
+        if self.config_window_open:
+            for alarm in alarms:
+                self.config_tree.item(str(alarm["id"]), values=self.config_row_values(alarm))
+
+    def selected_alarm_ids(self):
+        return [int(iid) for iid in self.config_tree.selection()]
+
+    def edit_selected(self, edit):
+        selection = self.selected_alarm_ids()
+        if len(selection) != 1:
+            messagebox.showinfo("Configure Alarms", "Select one alarm first.", parent=self.config_window)
+            return
+        if selection[0] in self.starting_alarms:
+            messagebox.showinfo("Configure Alarms", "This alarm is still starting.", parent=self.config_window)
+            return
+        edit(selection[0])
 
     def close_config_window(self, config_window):
         """Close the config window and reset the state."""
         config_window.destroy()
         self.config_window_open = False
+        self.config_window = None
 
     def add_alarm(self):
         # Open a dialog to select a folder for the new alarm
         folder = filedialog.askdirectory(title="Select Folder to Monitor")
         if folder:
             # Add the selected folder as a new alarm
-            new_alarm = {
-                "folder": folder,
-                "active": tk.BooleanVar(value=False),
-                "popup": None,
-                "observer": PollingObserver(),  # Use PollingObserver instead of Observer for better network drive support
-                "files": {}  # Dictionary to track files and their sizes
-            }
-            self.alarms.append(new_alarm)
+            self.add_alarms([{"folder": folder, "active": False}])
             messagebox.showinfo("Alarm Added", f"Alarm for folder '{folder}' added.")
-            self.open_config_window()  # Reopen the config window to refresh the list of alarms
 
-    def toggle_alarm(self, alarm_index):
-        # Toggle the monitoring for the specified alarm based on the checkbox state
-        alarm = self.alarms[alarm_index]
-        if alarm["active"].get():
-            self.start_monitoring(alarm)
+    def add_alarms(self, alarms_data, on_started=None):
+        """Create alarms from setup entries ({"folder", "active", ...}), add their rows and start the active ones.
+
+        Starting happens in the background; on_started() is called on the Tk thread once it is done.
+        """
+        new_alarms = [self.engine.new_alarm(
+            alarm_data["folder"], alarm_data.get("backend"), alarm_data.get("filters"), alarm_data.get("stability")
+        ) for alarm_data in alarms_data]
+        self.register_alarms(new_alarms, [False] * len(new_alarms))
+        self.set_alarms_active(
+            [alarm["id"] for alarm, alarm_data in zip(new_alarms, alarms_data) if alarm_data["active"]], True, on_started
+        )
+        return new_alarms
+
+    def register_alarms(self, new_alarms, active):
+        """Add engine alarms to the registry, config view and dashboard in one pass, marked on or off."""
+        self.make_room_for(sum(active))
+        for new_alarm, is_active in zip(new_alarms, active):
+            new_alarm["active"] = tk.BooleanVar(value=is_active)
+            new_alarm["popup"] = None
+            new_alarm["startup_time"] = None  # Seconds the last start took
+            self.alarms[new_alarm["id"]] = new_alarm
+            if is_active:
+                self.set_alarm_state(new_alarm, "No file yet", "waiting")
+            else:
+                self.set_alarm_state(new_alarm, "Off", "off")
+        self.insert_config_rows(new_alarms)
+
+    def make_room_for(self, switching_on):
+        # Called before alarms are switched on; popups are opened per alarm, so count them up front
+        active_count = sum(1 for alarm in self.alarms.values() if alarm["active"].get())
+        if self.use_popups.get() and active_count + switching_on > MAX_POPUPS:
+            # Too many windows to be useful; show every alarm on the dashboard instead
+            self.use_popups.set(False)
+            self.toggle_popups()
+            self.open_dashboard()
+
+    def import_alarms(self):
+        """Add and start alarms for every folder matching a glob, or listed in a CSV/JSON manifest."""
+        parent = self.config_window or self.root
+        source = simpledialog.askstring(
+            "Import Alarms", "Folder glob (e.g. /mnt/dvr/*/recordings), or leave empty to pick a CSV/JSON manifest:",
+            parent=parent,
+        )
+        if source is None:
+            return
+        if source.strip():
+            alarms_data = [{"folder": folder, "active": True} for folder in folders_from_glob(source.strip())]
         else:
+            manifest = filedialog.askopenfilename(
+                title="Select Alarm Manifest", filetypes=[("Manifests", "*.csv *.json"), ("All files", "*.*")], parent=parent
+            )
+            if not manifest:
+                return
+            try:
+                alarms_data = read_manifest(manifest)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                messagebox.showerror("Import Alarms", f"Could not read {manifest}: {e}", parent=parent)
+                return
+        if not alarms_data:
+            messagebox.showinfo("Import Alarms", "No folders to import.", parent=parent)
+            return
+
+        started = time.perf_counter()
+
+        def report_import():
+            elapsed = time.perf_counter() - started
+            times = sorted((alarm["startup_time"], alarm["folder"]) for alarm in new_alarms if alarm["startup_time"] is not None)
+            report = f"Imported {len(new_alarms)} alarms in {elapsed:.2f} s."
+            if times:
+                report += f"\n{len(times)} started, median {times[len(times) // 2][0] * 1000:.1f} ms per alarm.\nSlowest:"
+                report += "".join(f"\n  {seconds * 1000:.1f} ms  {folder}" for seconds, folder in reversed(times[-5:]))
+            failed = sum(1 for alarm, alarm_data in zip(new_alarms, alarms_data) if alarm_data["active"] and not alarm["active"].get())
+            if failed:
+                report += f"\n{failed} could not be started."
+            messagebox.showinfo("Import Alarms", report, parent=self.config_window or self.root)
+
+        new_alarms = self.add_alarms(alarms_data, on_started=report_import)
+
+    def delete_alarms(self, alarm_ids):
+        """Stop and remove alarms, dropping only their rows and tiles."""
+        alarms = [
+            self.alarms.pop(alarm_id) for alarm_id in alarm_ids
+            if alarm_id in self.alarms and alarm_id not in self.starting_alarms
+        ]
+        for alarm in alarms:
             self.stop_monitoring(alarm)
-
-    def start_monitoring(self, alarm):
-        # Show the alarm popup immediately, even if no file is present
-        self.show_alarm_popup(alarm, "No file yet", changing=True)
-
-        # Start monitoring the folder with the alarm's observer
-        event_handler = FileChangeHandler(self, alarm)
-        alarm["observer"].schedule(event_handler, alarm["folder"], recursive=True)  # Enable recursive monitoring
-
-        # Start the observer (each alarm has its own observer)
-        if not alarm["observer"].is_alive():
-            alarm["observer"].start()
+        self.forget_alarm_states(alarms)
+        if self.config_window_open and alarms:
+            self.config_tree.delete(*[str(alarm["id"]) for alarm in alarms])
+
+    def toggle_selected_alarms(self):
+        # Switch the selection on unless every selected alarm is already on
+        alarm_ids = self.selected_alarm_ids()
+        turn_on = not all(self.alarms[alarm_id]["active"].get() for alarm_id in alarm_ids)
+        self.set_alarms_active(alarm_ids, turn_on)
+
+    def set_alarms_active(self, alarm_ids, active, on_started=None):
+        changed = [
+            self.alarms[alarm_id] for alarm_id in alarm_ids
+            if self.alarms[alarm_id]["active"].get() != active and alarm_id not in self.starting_alarms
+        ]
+        if active:
+            self.make_room_for(len(changed))
+            self.start_monitoring(*changed, on_started=on_started)
+        else:
+            for alarm in changed:
+                alarm["active"].set(False)
+                self.stop_monitoring(alarm)
+        self.update_config_rows(changed)
+
+    def edit_filters(self, alarm_id):
+        """Edit the include/exclude patterns of an alarm; a running alarm is restarted with them."""
+        alarm = self.alarms[alarm_id]
+        dialog = tk.Toplevel(self.config_window or self.root)
+        dialog.title(f"Filters for {alarm['folder']}")
+
+        fields = (
+            ("include", "Only files matching:"),
+            ("exclude", "Ignore files matching:"),
+            ("extensions", "Only extensions (e.g. mp4 ts):"),
+            ("prune", "Skip folders matching:"),
+        )
+        config = alarm["filter"].to_config()
+        entries = {}
+        for row, (key, label) in enumerate(fields):
+            tk.Label(dialog, text=label).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+            entry = tk.Entry(dialog, width=40)
+            entry.insert(0, " ".join(config[key]))
+            entry.grid(row=row, column=1, padx=5, pady=2)
+            entries[key] = entry
+        tk.Label(dialog, text="Separate patterns with spaces. Globs match names; prefix re: for a regex on the full path.").grid(
+            row=len(fields), column=0, columnspan=2, sticky="w", padx=5)
+
+        def apply():
+            try:
+                new_filter = PathFilter.from_config({key: parse_patterns(entry.get()) for key, entry in entries.items()})
+            except re.error as e:
+                messagebox.showerror("Filters", f"Invalid regular expression: {e}", parent=dialog)
+                return
+            if alarm_id in self.starting_alarms:
+                messagebox.showinfo("Filters", "This alarm is still starting, try again in a moment.", parent=dialog)
+                return
+            dialog.destroy()
+            if new_filter == alarm["filter"]:
+                return
+            alarm["filter"] = new_filter
+            if alarm["active"].get():
+                self.restart_monitoring(alarm)
+
+        tk.Button(dialog, text="Apply", command=apply).grid(row=len(fields) + 1, column=1, sticky="e", padx=5, pady=5)
+
+    def edit_stability(self, alarm_id):
+        """Edit when a growing file of an alarm counts as finished; a running alarm is restarted."""
+        alarm = self.alarms[alarm_id]
+        dialog = tk.Toplevel(self.config_window or self.root)
+        dialog.title(f"Stability for {alarm['folder']}")
+
+        policy = alarm["policy"]
+        quiet_period = tk.DoubleVar(value=policy.quiet_period)
+        samples = tk.IntVar(value=policy.samples)
+        check_mtime = tk.BooleanVar(value=policy.check_mtime)
+        check_open_writers = tk.BooleanVar(value=policy.check_open_writers)
+        close_write = tk.BooleanVar(value=policy.close_write)
+
+        tk.Label(dialog, text="Seconds between checks:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        tk.Entry(dialog, textvariable=quiet_period, width=10).grid(row=0, column=1, sticky="w", padx=5)
+        tk.Label(dialog, text="Unchanged checks before finished:").grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        tk.Entry(dialog, textvariable=samples, width=10).grid(row=1, column=1, sticky="w", padx=5)
+        tk.Checkbutton(dialog, text="Also compare modification time", variable=check_mtime).grid(
+            row=2, column=0, columnspan=2, sticky="w", padx=5)
+        tk.Checkbutton(dialog, text="Wait while a program has the file open for writing (Linux)", variable=check_open_writers).grid(
+            row=3, column=0, columnspan=2, sticky="w", padx=5)
+        tk.Checkbutton(dialog, text="Finished as soon as the writer closes the file (local Linux folders)", variable=close_write).grid(
+            row=4, column=0, columnspan=2, sticky="w", padx=5)
+
+        def apply():
+            try:
+                new_policy = StabilityPolicy(
+                    quiet_period.get(), samples.get(), check_mtime.get(), check_open_writers.get(), close_write.get()
+                )
+            except (tk.TclError, ValueError):
+                messagebox.showerror("Stability", "Enter a positive number of seconds and at least one check.", parent=dialog)
+                return
+            if alarm_id in self.starting_alarms:
+                messagebox.showinfo("Stability", "This alarm is still starting, try again in a moment.", parent=dialog)
+                return
+            dialog.destroy()
+            if new_policy.to_config() == policy.to_config():
+                return
+            alarm["policy"] = new_policy
+            if alarm["active"].get():
+                self.restart_monitoring(alarm)
+
+        tk.Button(dialog, text="Apply", command=apply).grid(row=5, column=1, sticky="e", padx=5, pady=5)
+
+    def start_monitoring(self, *alarms, on_started=None):
+        # Show the alarms immediately, even if no file is present
+        for alarm in alarms:
+            alarm["active"].set(True)
+            self.set_alarm_state(alarm, "No file yet", "waiting")
+        self.starting_alarms.update(alarm["id"] for alarm in alarms)
+
+        # Start monitoring the folders through the engine's shared observer, in parallel and off the Tk thread:
+        # a big tree or a slow share can take a while
+        threading.Thread(
+            target=self.start_in_background, args=(alarms, on_started), name="AlarmStarter", daemon=True
+        ).start()
+
+    def start_in_background(self, alarms, on_started=None):
+        # Runs off the Tk thread; apply_setup_updates finishes up
+        self.setup_updates.put(("started", (alarms, self.engine.start_alarms(alarms), on_started)))
+
+    def restart_monitoring(self, alarm):
+        # Pick up new settings; like any start this runs in the background and an alarm that fails is set Off
+        self.engine.stop_alarm(alarm)
+        self.start_monitoring(alarm)
+
+    def alarms_started(self, alarms, startup_times):
+        for alarm in alarms:
+            alarm["startup_time"] = startup_times.get(alarm["id"])
+            if alarm["startup_time"] is None:
+                alarm["active"].set(False)  # Could not be started
+                self.set_alarm_state(alarm, "Off", "off")
 
     def stop_monitoring(self, alarm):
         # Close the alarm popup and stop monitoring the folder
@@ -145,12 +391,75 @@ class FileMonitorApp:
             alarm["popup"].destroy()
             alarm["popup"] = None
 
-        # Stop and join the observer (if active)
-        if alarm["observer"].is_alive():
-            alarm["observer"].stop()
-            alarm["observer"].join()
+        # Stop watching the folder; other alarms keep running
+        self.engine.stop_alarm(alarm)
+        self.set_alarm_state(alarm, "Off", "off")
+
+    def set_alarm_state(self, alarm, file_name, status):
+        """Record what an alarm shows ("waiting", "growing", "stopped" or "off") and update its views."""
+        self.alarm_states[alarm["id"]] = (file_name, status)
+        if self.dashboard:
+            self.dashboard.set_state(alarm["id"], alarm_title(alarm["folder"]), file_name, status)
+        if self.use_popups.get() and status != "off":
+            self.show_alarm_popup(alarm, file_name, changing=status != "stopped")
+
+    def forget_alarm_states(self, alarms):
+        for alarm in alarms:
+            self.alarm_states.pop(alarm["id"], None)
+        if self.dashboard:
+            self.dashboard.remove(*[alarm["id"] for alarm in alarms])
+
+    def open_dashboard(self):
+        if self.dashboard:
+            self.dashboard.lift()
+            return
+        self.dashboard = AlarmDashboard(self.root, on_close=self.on_dashboard_closed)
+        # Fill it from the state table in one pass
+        for alarm in self.alarms.values():
+            file_name, status = self.alarm_states.get(alarm["id"], ("Off", "off"))
+            self.dashboard.set_state(alarm["id"], alarm_title(alarm["folder"]), file_name, status)
+
+    def on_dashboard_closed(self):
+        self.dashboard = None
+
+    def toggle_popups(self):
+        for alarm in self.alarms.values():
+            if self.use_popups.get():
+                file_name, status = self.alarm_states.get(alarm["id"], ("Off", "off"))
+                if status != "off":
+                    self.show_alarm_popup(alarm, file_name, changing=status != "stopped")
+            elif alarm["popup"]:
+                alarm["popup"].destroy()
+                alarm["popup"] = None
+
+    def update_event_counts(self):
+        raw_events, handled_events = self.engine.event_counts()
+        self.events_label.config(text=f"Events: {raw_events} raw, {handled_events} handled, {self.repaints} repaints")
+        self.root.after(1000, self.update_event_counts)
+
+    def on_alarm_state(self, alarm, file_name, changing):
+        # Called from engine threads; only record the latest state, the Tk main loop paints it
+        with self.state_lock:
+            self.dirty_alarms[alarm["id"]] = (alarm, file_name, changing)
+            self.state_reports += 1
+
+    def paint_dirty_alarms(self):
+        # Take over alarms from the setup loader first; their state reports can only come after
+        self.apply_setup_updates()
+
+        # Repaint every alarm whose state was reported since the last pass
+        with self.state_lock:
+            dirty, self.dirty_alarms = self.dirty_alarms, {}
+        for alarm, file_name, changing in dirty.values():
+            if alarm["watch"] is not None:  # Skip alarms stopped after the report
+                self.set_alarm_state(alarm, file_name, "growing" if changing else "stopped")
+        self.root.after(ALARM_REPAINT_INTERVAL_MS, self.paint_dirty_alarms)
 
     def show_alarm_popup(self, alarm, file_name, changing):
+        # Nothing to do if the popup already shows this file and colour
+        if alarm["popup"] and alarm.get("painted") == (file_name, changing):
+            return
+
         # Display the alarm window
         if not alarm["popup"]:
             alarm["popup"] = tk.Toplevel(self.root)
@@ -178,6 +487,8 @@ class FileMonitorApp:
 
         # Draw the white text with a black outline
         self.draw_text_with_outline(alarm["canvas"], file_name)
+        alarm["painted"] = (file_name, changing)
+        self.repaints += 1
 
     def enable_dragging_on_left_click(self, window):
         """Allow the window to be dragged with left click."""
@@ -212,175 +523,217 @@ class FileMonitorApp:
         window.bind("<Button-3>", start_resize)
         window.bind("<B3-Motion>", do_resize)
 
+    def get_font(self, size):
+        # Font objects are shared by every popup and created once per size
+        font = self.fonts.get(size)
+        if font is None:
+            font = tkfont.Font(family="Arial", size=size)
+            self.fonts[size] = font
+        return font
+
     def draw_text_with_outline(self, canvas, text):
-        canvas.delete("all")  # Clear the canvas first
         width, height = canvas.winfo_width(), canvas.winfo_height()
-        font_size = max(int(width / 20), 10)  # Ensure a minimum font size
+
+        # Skip the redraw if neither the text nor the canvas size changed (e.g. while dragging)
+        if getattr(canvas, "_text_layout", None) == (text, width, height):
+            return
+        canvas._text_layout = (text, width, height)
+
+        font = self.get_font(max(int(width / 20), 10))  # Ensure a minimum font size
 
         # Coordinates for text placement (center)
         x = width / 2
         y = height / 2
 
-        # Draw outline by drawing the text multiple times shifted by 1 pixel
-        outline_color = "black"
-        for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            canvas.create_text(x + dx, y + dy, text=text, font=("Arial", font_size), fill=outline_color, tags="outline", width=width)
-
-        # Draw the main text
-        main_text_color = "white"
-        canvas.create_text(x, y, text=text, font=("Arial", font_size), fill=main_text_color, tags="text", width=width)
+        # Create the outline items (the text shifted by 1 pixel) and the main text once
+        if not hasattr(canvas, "_outline_items"):
+            canvas._outline_items = [
+                (canvas.create_text(0, 0, fill="black", tags="outline"), dx, dy)
+                for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+            ]
+            canvas.create_text(0, 0, fill="white", tags="text")
+
+        # Update the existing items in place
+        canvas.itemconfigure("outline", text=text, font=font, width=width)
+        canvas.itemconfigure("text", text=text, font=font, width=width)
+        for item, dx, dy in canvas._outline_items:
+            canvas.coords(item, x + dx, y + dy)
+        canvas.coords("text", x, y)
 
     def resize_alarm_text(self, event, alarm):
-        # Redraw the text whenever the window is resized
-        current_text = alarm["canvas"].itemcget("text", "text")
-        self.draw_text_with_outline(alarm["canvas"], current_text)
+        # Redraw the text once the resize settles instead of on every <Configure> event
+        if alarm.get("resize_pending"):
+            return
+        alarm["resize_pending"] = True
+        self.root.after(RESIZE_REDRAW_DELAY_MS, self.redraw_alarm_text, alarm)
+
+    def redraw_alarm_text(self, alarm):
+        alarm["resize_pending"] = False
+        if alarm["popup"]:
+            current_text = alarm["canvas"].itemcget("text", "text")
+            self.draw_text_with_outline(alarm["canvas"], current_text)
 
     def show_file_history(self):
-        # Display the file history in a popup window
+        # Display the file history in a popup window, one page at a time
         history_window = tk.Toplevel(self.root)
         history_window.title("File History")
-        history_window.geometry("400x300")
+        history_window.geometry("600x400")
 
-        if not self.file_history:
+        if not len(self.file_history):
             no_history_label = tk.Label(history_window, text="No files in history.")
             no_history_label.pack(pady=10)
-        else:
-            scrollbar = tk.Scrollbar(history_window)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-            history_listbox = tk.Listbox(history_window, yscrollcommand=scrollbar.set)
-            for i, file_entry in enumerate(self.file_history):
-                history_listbox.insert(tk.END, f"{i+1}: {file_entry}")
-            history_listbox.pack(fill="both", expand=True, padx=10, pady=10)
-
-            scrollbar.config(command=history_listbox.yview)
-
-    def save_setup(self):
-        """Save the current setup to a JSON file."""
+            return
+
+        # Filter fields: name contains, size range in bytes, date range as YYYY-MM-DD
+        filter_frame = tk.Frame(history_window)
+        filter_frame.pack(fill="x", padx=10, pady=5)
+        filters = {}
+        for column, (key, label) in enumerate([("name", "Name"), ("min_size", "Min size"), ("max_size", "Max size"),
+                                               ("since", "From date"), ("until", "To date")]):
+            tk.Label(filter_frame, text=label).grid(row=0, column=column, sticky="w")
+            filters[key] = tk.StringVar()
+            tk.Entry(filter_frame, textvariable=filters[key], width=11).grid(row=1, column=column, padx=2)
+
+        scrollbar = tk.Scrollbar(history_window)
+        history_listbox = tk.Listbox(history_window, yscrollcommand=scrollbar.set)
+        scrollbar.config(command=history_listbox.yview)
+
+        nav_frame = tk.Frame(history_window)
+        nav_frame.pack(side=tk.BOTTOM, fill="x", padx=10, pady=5)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        history_listbox.pack(fill="both", expand=True, padx=10, pady=5)
+        page_label = tk.Label(nav_frame)
+
+        state = {"page": 0, "query": {}, "count": 0}
+
+        def parse_filters():
+            query = {}
+            try:
+                if filters["name"].get().strip():
+                    query["name"] = filters["name"].get().strip()
+                if filters["min_size"].get().strip():
+                    query["min_size"] = int(filters["min_size"].get())
+                if filters["max_size"].get().strip():
+                    query["max_size"] = int(filters["max_size"].get())
+                if filters["since"].get().strip():
+                    query["since"] = datetime.strptime(filters["since"].get().strip(), "%Y-%m-%d").timestamp()
+                if filters["until"].get().strip():
+                    # Include the whole "to" day
+                    query["until"] = datetime.strptime(filters["until"].get().strip(), "%Y-%m-%d").timestamp() + 86400
+            except ValueError:
+                messagebox.showerror("File History", "Sizes must be whole numbers and dates YYYY-MM-DD.", parent=history_window)
+                return None
+            return query
+
+        def show_page(page):
+            pages = max(1, -(-state["count"] // HISTORY_PAGE_SIZE))
+            state["page"] = max(0, min(page, pages - 1))
+            entries = self.file_history.page(state["page"] * HISTORY_PAGE_SIZE, HISTORY_PAGE_SIZE, **state["query"])
+            history_listbox.delete(0, tk.END)
+            for entry in entries:
+                history_listbox.insert(tk.END, f"{entry.seq}: {format_entry(entry)}")
+            page_label.config(text=f"Page {state['page'] + 1} of {pages} ({state['count']} files)")
+
+        def apply_filters():
+            query = parse_filters()
+            if query is None:
+                return
+            state["query"] = query
+            state["count"] = self.file_history.count(**query)
+            show_page(0)
+
+        tk.Button(filter_frame, text="Filter", command=apply_filters).grid(row=1, column=5, padx=5)
+        tk.Button(nav_frame, text="<< Prev", command=lambda: show_page(state["page"] - 1)).pack(side=tk.LEFT)
+        tk.Button(nav_frame, text="Next >>", command=lambda: show_page(state["page"] + 1)).pack(side=tk.LEFT)
+        page_label.pack(side=tk.LEFT, padx=10)
+
+        # Start on the newest page so recent files are visible without paging
+        state["count"] = len(self.file_history)
+        show_page(state["count"] // HISTORY_PAGE_SIZE)
+
+    def setup_data(self):
         setup_data = []
-        for alarm in self.alarms:
+        for alarm in self.alarms.values():
             setup_data.append({
                 "folder": alarm["folder"],
-                "active": alarm["active"].get()
+                "active": alarm["active"].get(),
+                "backend": alarm["backend"],
+                "filters": alarm["filter"].to_config(),
+                "stability": alarm["policy"].to_config()
             })
-        with open(SETUP_FILE, 'w') as setup_file:
-            json.dump(setup_data, setup_file, indent=4)
-        messagebox.showinfo("Save Setup", "Setup saved successfully.")
+        return setup_data
+
+    def save_setup(self, show_result=True):
+        """Save the current setup to a JSON file."""
+        if self.saved_setup is None:
+            # Still loading, or the file could not be read; do not replace it with a partial setup
+            if show_result:
+                messagebox.showwarning("Save Setup", "The saved setup has not been loaded, not overwriting it.")
+            return
+        setup_data = self.setup_data()
+        try:
+            write_setup(setup_data)
+        except OSError as e:
+            messagebox.showerror("Save Setup", f"Could not save setup: {e}")
+            return
+        self.saved_setup = setup_data
+        if show_result:
+            messagebox.showinfo("Save Setup", "Setup saved successfully.")
 
     def load_setup(self):
-        """Load the setup from the JSON file if it exists."""
-        if os.path.exists(SETUP_FILE):
-            with open(SETUP_FILE, 'r') as setup_file:
-                setup_data = json.load(setup_file)
-                for alarm_data in setup_data:
-                    new_alarm = {
-                        "folder": alarm_data["folder"],
-                        "active": tk.BooleanVar(value=alarm_data["active"]),
-                        "popup": None,
-                        "observer": Observer(),
-                        "files": {}
-                    }
-                    self.alarms.append(new_alarm)
-                    if alarm_data["active"]:
-                        self.start_monitoring(new_alarm)
+        """Load the setup from the JSON file if it exists, creating and starting its alarms on a worker thread."""
+        threading.Thread(target=self.load_setup_in_background, name="SetupLoader", daemon=True).start()
+
+    def load_setup_in_background(self):
+        # Runs off the Tk thread; hands alarms over through setup_updates
+        try:
+            setup_data = read_setup()
+        except ValueError as e:
+            self.setup_updates.put(("error", e))
+            return
+        new_alarms = [self.engine.new_alarm(
+            alarm_data["folder"], alarm_data.get("backend"), alarm_data.get("filters"), alarm_data.get("stability")
+        ) for alarm_data in setup_data]
+        self.setup_updates.put(("loaded", (setup_data, new_alarms)))
+        active_alarms = [alarm for alarm, alarm_data in zip(new_alarms, setup_data) if alarm_data["active"]]
+        self.start_in_background(active_alarms)
+
+    def apply_setup_updates(self):
+        while True:
+            try:
+                kind, update = self.setup_updates.get_nowait()
+            except queue.Empty:
+                return
+            if kind == "error":
+                messagebox.showerror("Load Setup", f"{update}\nChanges will not be saved automatically.")
+            elif kind == "loaded":
+                setup_data, new_alarms = update
+                self.register_alarms(new_alarms, [alarm_data["active"] for alarm_data in setup_data])
+                self.starting_alarms.update(alarm["id"] for alarm, alarm_data in zip(new_alarms, setup_data) if alarm_data["active"])
+                self.saved_setup = setup_data
+            else:
+                active_alarms, startup_times, on_started = update
+                self.starting_alarms.difference_update(alarm["id"] for alarm in active_alarms)
+                self.alarms_started(active_alarms, startup_times)
+                self.update_config_rows(active_alarms)
+                if on_started:
+                    on_started()
 
     def on_closing(self):
         """Handle the app shutdown cleanly when the window is closed."""
-        self.save_setup()  # Automatically save the setup when closing
-        for alarm in self.alarms:
+        if self.saved_setup is not None and self.setup_data() != self.saved_setup:
+            self.save_setup()  # Automatically save the setup when closing
+        for alarm in self.alarms.values():
             self.stop_monitoring(alarm)
+        self.engine.shutdown()
         self.root.quit()  # Stops the main loop
         self.root.destroy()  # Closes the window
 
 
-# Custom event handler to monitor file system events
-class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, app, alarm):
-        self.app = app
-        self.alarm = alarm
-        self.file_sizes = {}
-        self.lock = threading.Lock()
-        self.check_intervals = {}
-
-    def on_created(self, event):
-        if not event.is_directory:
-            file_path = event.src_path
-            file_name = os.path.basename(file_path)
-            file_size = os.path.getsize(file_path)
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Get current timestamp
-
-            with self.lock:
-                self.file_sizes[file_path] = file_size
-                self.alarm["files"][file_path] = {
-                    "name": file_name,
-                    "size": self.file_sizes[file_path],
-                    "timer": None
-                }
-
-            # Add file history with timestamp and size
-            history_entry = f"File: {file_name}, Size: {file_size} bytes, Timestamp: {timestamp}"
-            self.app.file_history.append(history_entry)
-
-            # Show the alarm popup with green background
-            self.app.root.after(0, lambda: self.app.show_alarm_popup(self.alarm, file_name, changing=True))
-
-            # Start the size check timer
-            self.start_size_check(file_path)
-
-    def on_modified(self, event):
-        if not event.is_directory:
-            file_path = event.src_path
-            with self.lock:
-                if file_path in self.file_sizes:
-                    current_size = os.path.getsize(file_path)
-                    previous_size = self.file_sizes[file_path]
-                    if current_size != previous_size:
-                        self.file_sizes[file_path] = current_size
-                        self.alarm["files"][file_path]["size"] = current_size
-                        # Reset the size check timer
-                        if self.alarm["files"][file_path]["timer"]:
-                            self.alarm["files"][file_path]["timer"].cancel()
-                        self.start_size_check(file_path)
-                        # Update the popup to green
-                        self.app.root.after(0, lambda: self.app.show_alarm_popup(self.alarm, os.path.basename(file_path), changing=True))
-
-    def start_size_check(self, file_path):
-        # Schedule a check after 5 seconds
-        timer = threading.Timer(5.0, self.check_size, args=(file_path,))
-        self.alarm["files"][file_path]["timer"] = timer
-        timer.start()
-
-    def check_size(self, file_path):
-        with self.lock:
-            if file_path in self.file_sizes:
-                try:
-                    current_size = os.path.getsize(file_path)
-                    previous_size = self.file_sizes[file_path]
-                    if current_size == previous_size:
-                        # Size hasn't changed; stop monitoring this file
-                        file_name = os.path.basename(file_path)
-                        # Update the popup to red
-                        self.app.root.after(0, lambda: self.app.show_alarm_popup(self.alarm, file_name, changing=False))
-                        # Remove from tracking
-                        del self.file_sizes[file_path]
-                        del self.alarm["files"][file_path]
-                    else:
-                        # Size has changed; update and restart timer
-                        self.file_sizes[file_path] = current_size
-                        self.alarm["files"][file_path]["size"] = current_size
-                        self.start_size_check(file_path)
-                except FileNotFoundError:
-                    # File might have been deleted before the check
-                    file_name = os.path.basename(file_path)
-                    self.app.root.after(0, lambda: self.app.show_alarm_popup(self.alarm, file_name, changing=False))
-                    del self.file_sizes[file_path]
-                    del self.alarm["files"][file_path]
-
-
 # Main function to run the app
-def main():
+def main(workers=0):
     root = tk.Tk()
-    app = FileMonitorApp(root)
+    app = FileMonitorApp(root, workers)
     root.mainloop()
 
 
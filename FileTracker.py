@@ -3,16 +3,26 @@ import time
 import tkinter as tk
 from tkinter import ttk, filedialog
 from pathlib import Path
+from virtual_list import VirtualFileList
+from scanner import ScanWorker
+from records import FileTable
 
 class FileMonitorApp:
+    DRAIN_INTERVAL_MS = 100  # How often the GUI pulls scan results from the worker
+    MAX_BATCHES_PER_DRAIN = 10  # Upper bound on work done per drain so the UI stays responsive
+    RESORT_INTERVAL = 1.0  # Minimum seconds between re-sorts of a list sorted by a column heading
+
     def __init__(self, root):
         self.root = root
         self.root.title("File Monitor")
         
         self.folder_path = tk.StringVar()
         self.interval = tk.IntVar(value=10)
-        self.files_info = {}
+        self.files_info = FileTable()
         self.monitoring = False
+        self.worker = None  # Background scanner feeding files_info through a queue
+        self.list_dirty = False  # files_info changed since a column-sorted list was last sorted
+        self.last_resort = 0
         
         self.create_widgets()
 
@@ -35,15 +45,19 @@ class FileMonitorApp:
         tree_frame = ttk.Frame(self.root)
         tree_frame.pack(padx=10, pady=10, fill='both', expand=True)
         
-        self.tree = ttk.Treeview(tree_frame, columns=("name", "size", "status"), show="headings")
-        self.tree.heading("name", text="Name")
-        self.tree.heading("size", text="Size (bytes)")
-        self.tree.heading("status", text="Status")
-        self.tree.pack(side="left", fill='both', expand=True)
-
-        self.tree_scroll = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=self.tree_scroll.set)
-        self.tree_scroll.pack(side="right", fill="y")
+        # Only the visible rows are materialized, the rest stay in files_info
+        self.tree = VirtualFileList(
+            tree_frame,
+            columns=("name", "size", "status"),
+            headings=("Name", "Size (bytes)", "Status"),
+            row_values=self.file_row_values,
+            sort_keys={
+                "name": lambda path: os.path.basename(path).lower(),
+                "size": lambda path: self.files_info.get(path, (0, 0))[0],
+                "status": lambda path: self.files_info.get(path, (0, 0))[1],
+            }
+        )
+        self.tree.pack(fill='both', expand=True)
 
         # Define styles for status tags with lighter colors
         self.tree.tag_configure('checking', background='#FFFF99', font=('Helvetica', 10, 'bold'), foreground='black')  # Light yellow
@@ -58,6 +72,8 @@ class FileMonitorApp:
         if self.monitoring:
             # Stop monitoring
             self.monitoring = False
+            self.worker.stop()
+            self.worker = None
             self.start_monitoring_button.config(text="Start Monitoring")
         else:
             # Start monitoring
@@ -68,88 +84,56 @@ class FileMonitorApp:
             
             self.monitoring = True
             self.start_monitoring_button.config(text="Stop Monitoring")
-            self.monitor_folder(folder)
-
-    def monitor_folder(self, folder):
-        if not self.monitoring:
-            return
-        
-        self.update_files_info(folder)
-        self.update_treeview()
-        # Schedule the next monitoring event
-        self.root.after(self.interval.get() * 1000, lambda: self.monitor_folder(folder))
+            self.files_info = FileTable()
+            self.update_treeview()
+            self.worker = ScanWorker(folder, self.interval.get())
+            self.worker.start()
+            self.process_updates(self.worker)
+
+    def process_updates(self, worker):
+        # Runs on the Tk thread; applies a bounded number of scan batches per call
+        if worker is not self.worker:
+            return  # Monitoring was stopped or restarted
+        try:
+            worker.interval = self.interval.get()
+        except tk.TclError:
+            pass  # Keep the previous interval while the entry is being edited
+
+        new_paths, changed = worker.apply_updates(self.files_info, self.MAX_BATCHES_PER_DRAIN)
+        for file_path in new_paths:
+            print(f"New file detected: {file_path} with size {self.files_info[file_path][0]} bytes")
+        # files_info keeps its time order as batches are applied, so the default view only needs a
+        # redraw; a list sorted by a column heading is a copy and is re-sorted now and then
+        self.list_dirty = (self.list_dirty or changed) and self.tree.sort_column is not None
+        if self.list_dirty and time.monotonic() - self.last_resort >= self.RESORT_INTERVAL:
+            self.update_treeview()
+            self.list_dirty = False
+            self.last_resort = time.monotonic()
+        elif changed and self.tree.sort_column is None and self.tree.at_bottom():
+            self.tree.scroll_to_end()  # Keep following the newest files
+        else:
+            self.tree.refresh()  # Statuses still age even when no files changed
+        # Schedule the next drain
+        self.root.after(self.DRAIN_INTERVAL_MS, lambda: self.process_updates(worker))
 
-    def update_files_info(self, folder):
-        current_files_info = {}
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    size = os.path.getsize(file_path)
-                except OSError:
-                    size = 0
-                
-                if file_path in self.files_info:
-                    last_size, last_change_time = self.files_info[file_path]
-                    if size != last_size:
-                        current_files_info[file_path] = (size, time.time())
-                    else:
-                        current_files_info[file_path] = (last_size, last_change_time)
-                else:
-                    current_files_info[file_path] = (size, time.time())
-                    print(f"New file detected: {file_path} with size {size} bytes")
-        
-        self.files_info = current_files_info
+    def file_row_values(self, file_path):
+        # A column-sorted list is re-sorted at most once per RESORT_INTERVAL, so a row can briefly outlive its file
+        size, last_change_time = self.files_info.get(file_path, (0, 0))
+        if time.time() - last_change_time <= 10:
+            return (os.path.basename(file_path), size, "Checking..."), 'checking'
+        return (os.path.basename(file_path), size, "Finished"), 'finished'
 
     def update_treeview(self):
-        # Cache current scrollbar position
-        current_scroll_position = self.tree.yview()
-        
-        # Get current items in TreeView for comparison
-        current_items = set(self.tree.get_children())
-        new_items = set()
-
-        # Sort files so the latest are at the bottom
-        sorted_files = sorted(self.files_info.items(), key=lambda x: x[1][1])
-
-        # Add or update items in the TreeView
-        for file_path, (size, last_change_time) in sorted_files:
-            file_name = os.path.basename(file_path)
-            time_since_change = time.time() - last_change_time
-            if time_since_change <= 10:
-                status = "Checking..."
-                tag = 'checking'
-            else:
-                status = "Finished"
-                tag = 'finished'
-
-            # Check if the item already exists
-            matching_item = None
-            for item in current_items:
-                if self.tree.item(item, "values")[0] == file_name:
-                    matching_item = item
-                    break
-
-            if matching_item:
-                # Update the item if needed
-                self.tree.item(matching_item, values=(file_name, size, status), tags=(tag,))
-                current_items.remove(matching_item)  # Remove from current_items since it is still relevant
-            else:
-                # Insert new item
-                new_item = self.tree.insert("", "end", values=(file_name, size, status), tags=(tag,))
-                new_items.add(new_item)
-
-        # Remove any old items that are no longer present
-        for item in current_items:
-            self.tree.delete(item)
+        # Check if the user is looking at the bottom before the list changes
+        was_at_bottom = self.tree.at_bottom()
+        previous_count = len(self.tree.keys)
 
-        # Determine if we should scroll to the bottom
-        if len(new_items) > 0 and self.user_is_at_bottom(current_scroll_position):
-            self.tree.yview_moveto(1.0)  # Scroll to bottom if new items are added and user was at the bottom
+        # Latest files at the bottom, in the order the table keeps as files change
+        self.tree.set_items(self.files_info.ordered_paths())
 
-    def user_is_at_bottom(self, current_scroll_position):
-        # Check if the current scroll position is at the bottom of the list
-        return current_scroll_position[1] == 1.0
+        # Scroll to bottom if new items are added and user was at the bottom
+        if len(self.tree.keys) > previous_count and was_at_bottom:
+            self.tree.scroll_to_end()
 
     def toggle_always_on_top(self):
         self.root.attributes("-topmost", self.always_on_top.get())
@@ -1,19 +1,38 @@
 import os
+import re
 import time
 import tkinter as tk
 from tkinter import ttk, filedialog
 from pathlib import Path
+from virtual_list import VirtualFileList
+from engine import FolderTracker
+from filters import PathFilter, parse_patterns
+from stability import StabilityPolicy
 
 class FileMonitorApp:
+    ADAPTIVE_MIN_INTERVAL = 0.5  # Seconds between checks while files are growing
+    ADAPTIVE_MAX_INTERVAL = 30.0  # Upper bound for the check interval of an idle folder
+    SCAN_THREADS = 8  # Parallel listing/stat calls per scan; hides round trips on network shares
+
     def __init__(self, root):
         self.root = root
         self.root.title("File Monitor")
         
         self.folder_path = tk.StringVar()
         self.interval = tk.IntVar(value=10)
-        self.files_info = {}
+        self.adaptive_interval = tk.BooleanVar(value=True)  # Ignore the fixed interval and follow write activity
+        self.scan_threads = tk.IntVar(value=self.SCAN_THREADS)  # 1 scans serially
+        self.idle_after = tk.DoubleVar(value=FolderTracker.LOGGING_WINDOW)  # Seconds without growth before a file is idle
+        self.writer_check = tk.BooleanVar()  # Files still open for writing stay "Logging..." (Linux)
+        self.tracker = FolderTracker(self.ADAPTIVE_MIN_INTERVAL, self.ADAPTIVE_MAX_INTERVAL, self.SCAN_THREADS)  # GUI-free scanning and status
+        self.files_info = self.tracker.files_info  # Updated in place by the tracker
+        self.tree_rows = {}  # file path -> (tree item id, size, status) currently shown
         self.monitoring = False
         self.file_extension_filter = tk.StringVar()  # New variable for extension filter
+        self.exclude_patterns = tk.StringVar()  # Globs / re: patterns to skip; "name/" skips a folder
+        self.filter_text = None  # (extensions, excludes) the tracker's filter was built from
+        self.virtual_list = tk.BooleanVar()  # Only materialize visible rows, for very large folders
+        self.list_dirty = True  # files_info changed since the virtual list was last fed
         
         self.create_widgets()
 
@@ -32,14 +51,25 @@ class FileMonitorApp:
         
         self.always_on_top = tk.BooleanVar()
         ttk.Checkbutton(frame, text="Always on Top", variable=self.always_on_top, command=self.toggle_always_on_top).grid(row=1, column=2, sticky='w')
+        ttk.Checkbutton(frame, text="Virtual List", variable=self.virtual_list, command=self.toggle_virtual_list).grid(row=1, column=3, sticky='w')
         
         # New ticker entry and label for extension filter
         ttk.Label(frame, text="File Extension Filter (e.g., mp4):").grid(row=2, column=0, sticky='w')
         filter_entry = ttk.Entry(frame, textvariable=self.file_extension_filter, width=10)
         filter_entry.grid(row=2, column=1, sticky='w')
+        ttk.Checkbutton(frame, text="Adaptive Interval", variable=self.adaptive_interval).grid(row=2, column=2, sticky='w')
+        ttk.Checkbutton(frame, text="Open-for-Write Check", variable=self.writer_check).grid(row=2, column=3, sticky='w')
         
         # Information for user about the filter
         ttk.Label(frame, text="Filter files by extension. Enter 'mp4' or '.mp4' to filter for video files.").grid(row=3, column=0, columnspan=3, sticky='w')
+
+        ttk.Label(frame, text="Scan Threads:").grid(row=4, column=0, sticky='w')
+        ttk.Entry(frame, textvariable=self.scan_threads, width=10).grid(row=4, column=1, sticky='w')
+        ttk.Label(frame, text="Idle After (sec):").grid(row=4, column=2, sticky='w')
+        ttk.Entry(frame, textvariable=self.idle_after, width=10).grid(row=4, column=3, sticky='w')
+
+        ttk.Label(frame, text="Exclude (e.g. *.tmp thumbs/ re:\\.part$):").grid(row=5, column=0, sticky='w')
+        ttk.Entry(frame, textvariable=self.exclude_patterns, width=50).grid(row=5, column=1, columnspan=3, sticky='w', padx=5)
         
         tree_frame = ttk.Frame(self.root)
         tree_frame.pack(padx=10, pady=10, fill='both', expand=True)
@@ -54,9 +84,23 @@ class FileMonitorApp:
         self.tree.configure(yscrollcommand=self.tree_scroll.set)
         self.tree_scroll.pack(side="right", fill="y")
 
+        # Virtual list shown instead of the tree when "Virtual List" is ticked
+        self.file_list = VirtualFileList(
+            tree_frame,
+            columns=("name", "size", "status"),
+            headings=("Name", "Size (bytes)", "Status"),
+            row_values=self.file_row_values,
+            sort_keys={
+                "name": lambda path: os.path.basename(path).lower(),
+                "size": lambda path: self.files_info[path][0],
+                "status": lambda path: self.files_info[path][1],
+            }
+        )
+
         # Define styles for status tags
-        self.tree.tag_configure('logging', background='#FFFF99', font=('Helvetica', 10, 'bold'), foreground='black')  # Light yellow
-        self.tree.tag_configure('idle', background='#99FF99', font=('Helvetica', 10, 'bold'), foreground='black')  # Light green
+        for widget in (self.tree, self.file_list):
+            widget.tag_configure('logging', background='#FFFF99', font=('Helvetica', 10, 'bold'), foreground='black')  # Light yellow
+            widget.tag_configure('idle', background='#99FF99', font=('Helvetica', 10, 'bold'), foreground='black')  # Light green
 
     def browse_folder(self):
         folder_selected = filedialog.askdirectory()
@@ -68,6 +112,7 @@ class FileMonitorApp:
             # Stop monitoring
             self.monitoring = False
             self.start_monitoring_button.config(text="Start Monitoring")
+            self.tracker.save_state()
         else:
             # Start monitoring
             folder = self.folder_path.get()
@@ -77,86 +122,142 @@ class FileMonitorApp:
             
             self.monitoring = True
             self.start_monitoring_button.config(text="Stop Monitoring")
+            self.tracker.interval.reset()
+            self.tracker.scanner.set_workers(self.scan_threads.get())
+            self.update_filter()
+            if self.tracker.load_state(folder):
+                self.list_dirty = True  # Files known from the last run show up without a "new file" for each
             self.monitor_folder(folder)
 
     def monitor_folder(self, folder):
         if not self.monitoring:
             return
         
-        self.update_files_info(folder)
+        active = self.update_files_info(folder)
         self.update_treeview()
+        # Check again soon while files are growing, back off while the folder is idle
+        if self.adaptive_interval.get():
+            delay = self.tracker.next_delay(active)
+        else:
+            delay = self.interval.get()
         # Schedule the next monitoring event
-        self.root.after(self.interval.get() * 1000, lambda: self.monitor_folder(folder))
+        self.root.after(int(delay * 1000), lambda: self.monitor_folder(folder))
+
+    def update_filter(self):
+        # Filters are applied by the scanner, so excluded files and folders are never stat'ed
+        filter_text = (self.file_extension_filter.get(), self.exclude_patterns.get())
+        if filter_text == self.filter_text:
+            return
+        patterns = parse_patterns(filter_text[1])
+        try:
+            path_filter = PathFilter(
+                exclude=[pattern for pattern in patterns if not pattern.endswith("/")],
+                extensions=parse_patterns(filter_text[0].replace(",", " ")),
+                prune=[pattern.rstrip("/") for pattern in patterns if pattern.endswith("/")],
+            )
+        except re.error as e:
+            print(f"Invalid exclude pattern: {e}")
+            return
+        self.filter_text = filter_text
+        self.tracker.set_filter(path_filter)
+
+    def update_policy(self):
+        try:
+            idle_after = self.idle_after.get()
+        except tk.TclError:
+            return  # Keep the previous policy while the entry is being edited
+        if idle_after > 0:
+            self.tracker.policy = StabilityPolicy(quiet_period=idle_after, check_open_writers=self.writer_check.get())
 
     def update_files_info(self, folder):
-        current_files_info = {}
-        for root, _, files in os.walk(folder):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    size = os.path.getsize(file_path)
-                except OSError:
-                    size = 0
-                
-                if file_path in self.files_info:
-                    last_size, last_change_time = self.files_info[file_path]
-                    if size != last_size:
-                        current_files_info[file_path] = (size, time.time())
-                    else:
-                        current_files_info[file_path] = (last_size, last_change_time)
-                else:
-                    current_files_info[file_path] = (size, time.time())
-                    print(f"New file detected: {file_path} with size {size} bytes")
-        
-        self.files_info = current_files_info
+        self.update_filter()
+        self.update_policy()
+        # Only directories and files that changed since the last pass are re-read
+        added, changed, removed = self.tracker.poll(folder)
+        if added or changed or removed:
+            self.list_dirty = True
+        for file_path in added:
+            print(f"New file detected: {file_path} with size {self.files_info[file_path][0]} bytes")
+        return bool(added or changed)
+
+    def toggle_virtual_list(self):
+        if self.virtual_list.get():
+            self.tree.pack_forget()
+            self.tree_scroll.pack_forget()
+            self.tree.delete(*[row[0] for row in self.tree_rows.values()])
+            self.tree_rows = {}
+            self.file_list.pack(fill='both', expand=True)
+        else:
+            self.file_list.pack_forget()
+            self.file_list.set_items([])
+            self.tree.pack(side="left", fill='both', expand=True)
+            self.tree_scroll.pack(side="right", fill="y")
+        self.list_dirty = True
+        self.update_treeview()
+
+    def file_row_values(self, file_path):
+        size = self.files_info[file_path][0]
+        if self.tracker.is_logging(file_path):
+            return (os.path.basename(file_path), size, "Logging..."), 'logging'
+        return (os.path.basename(file_path), size, "Idle"), 'idle'
+
+    def update_virtual_list(self):
+        if not self.list_dirty:
+            # Same files, only the visible statuses can have aged
+            self.file_list.refresh()
+            return
+
+        was_at_bottom = self.file_list.at_bottom()
+        # Latest files at the bottom; the table keeps this order as files change, nothing is re-sorted
+        self.file_list.set_items(self.files_info.ordered_paths())
+        if was_at_bottom:
+            self.file_list.scroll_to_end()
+        self.list_dirty = False
 
     def update_treeview(self):
+        if self.virtual_list.get():
+            self.update_virtual_list()
+            return
+
         # Cache current scrollbar position
         current_scroll_position = self.tree.yview()
-        
-        # Get current items in TreeView for comparison
-        current_items = set(self.tree.get_children())
-        new_items = set()
+        now = time.time()
 
-        # Sort files so the latest are at the bottom
-        sorted_files = sorted(self.files_info.items(), key=lambda x: x[1][1])
+        stale_paths = set(self.tree_rows)
+        new_files = []
 
-        # Filter by file extension if specified
-        extension_filter = self.file_extension_filter.get().lstrip('.')
-        
-        for file_path, (size, last_change_time) in sorted_files:
+        for file_path, (size, last_change_time) in self.files_info.items():
             file_name = os.path.basename(file_path)
-            
-            # Check file extension if a filter is applied
-            if extension_filter and not file_name.lower().endswith(f".{extension_filter.lower()}"):
-                continue
-            
-            time_since_change = time.time() - last_change_time
-            if time_since_change <= 10:
+
+            if self.tracker.is_logging(file_path, now):
                 status = "Logging..."
                 tag = 'logging'
             else:
                 status = "Idle"
                 tag = 'idle'
 
-            matching_item = None
-            for item in current_items:
-                if self.tree.item(item, "values")[0] == file_name:
-                    matching_item = item
-                    break
+            row = self.tree_rows.get(file_path)
+            if row is None:
+                new_files.append((last_change_time, file_path, file_name, size, status, tag))
+                continue
 
-            if matching_item:
-                self.tree.item(matching_item, values=(file_name, size, status), tags=(tag,))
-                current_items.remove(matching_item)  # Remove from current_items since it is still relevant
-            else:
-                new_item = self.tree.insert("", "end", values=(file_name, size, status), tags=(tag,))
-                new_items.add(new_item)
+            stale_paths.discard(file_path)
+            # Only touch the widget when the row actually changed
+            if row[1] != size or row[2] != status:
+                self.tree.item(row[0], values=(file_name, size, status), tags=(tag,))
+                self.tree_rows[file_path] = (row[0], size, status)
 
         # Remove old items no longer present
-        for item in current_items:
-            self.tree.delete(item)
+        if stale_paths:
+            self.tree.delete(*[self.tree_rows.pop(file_path)[0] for file_path in stale_paths])
+
+        # Insert new files sorted so the latest are at the bottom
+        new_files.sort()
+        for last_change_time, file_path, file_name, size, status, tag in new_files:
+            item = self.tree.insert("", "end", values=(file_name, size, status), tags=(tag,))
+            self.tree_rows[file_path] = (item, size, status)
 
-        if len(new_items) > 0 and self.user_is_at_bottom(current_scroll_position):
+        if new_files and self.user_is_at_bottom(current_scroll_position):
             self.tree.yview_moveto(1.0)
 
     def user_is_at_bottom(self, current_scroll_position):
@@ -165,7 +266,13 @@ class FileMonitorApp:
     def toggle_always_on_top(self):
         self.root.attributes("-topmost", self.always_on_top.get())
 
+    def on_closing(self):
+        # Keep the file table so the next start only reconciles what changed
+        self.tracker.save_state()
+        self.root.destroy()
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = FileMonitorApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
@@ -0,0 +1,27 @@
+class AdaptiveInterval:
+    """Polling interval that follows write activity.
+
+    While something is changing the interval drops straight to
+    min_interval so the end of a write is seen quickly. Every idle poll
+    multiplies it by backoff, up to max_interval, so quiet folders (and
+    network shares in particular) are hit less and less often.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=30.0, backoff=2.0):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Need 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.current = min_interval
+
+    def update(self, active):
+        """Record the outcome of a poll and return the delay until the next one."""
+        if active:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.max_interval, self.current * self.backoff)
+        return self.current
+
+    def reset(self):
+        self.current = self.min_interval
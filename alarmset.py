@@ -5,6 +5,7 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import threading
 import time
+from stability import get_scheduler
 
 class FileMonitorApp:
     def __init__(self, root):
@@ -108,6 +109,7 @@ class FileMonitorApp:
 
         # Start monitoring the folder with the alarm's observer
         event_handler = FileChangeHandler(self, alarm)
+        alarm["handler"] = event_handler
         alarm["observer"].schedule(event_handler, alarm["folder"], recursive=False)
 
         # Start the observer (each alarm has its own observer)
@@ -125,6 +127,11 @@ class FileMonitorApp:
             alarm["observer"].stop()
             alarm["observer"].join()
 
+        # Cancel pending size checks so they don't fire after the alarm is stopped
+        if alarm.get("handler"):
+            alarm["handler"].cancel_size_checks()
+            alarm["handler"] = None
+
     def show_alarm_popup(self, alarm, file_name, changing):
         # Display the alarm window
         if not alarm["popup"]:
@@ -250,6 +257,7 @@ class FileChangeHandler(FileSystemEventHandler):
         self.file_sizes = {}
         self.lock = threading.Lock()
         self.check_intervals = {}
+        self.scheduler = get_scheduler()  # One shared thread runs the size checks for every file
 
     def on_created(self, event):
         if not event.is_directory:
@@ -286,9 +294,15 @@ class FileChangeHandler(FileSystemEventHandler):
 
     def start_size_check(self, file_path):
         # Schedule a check after 5 seconds
-        timer = threading.Timer(5.0, self.check_size, args=(file_path,))
+        timer = self.scheduler.schedule(5.0, self.check_size, file_path)
         self.alarm["files"][file_path]["timer"] = timer
-        timer.start()
+
+    def cancel_size_checks(self):
+        # Drop any pending checks when monitoring stops
+        with self.lock:
+            for file_info in self.alarm["files"].values():
+                if file_info["timer"]:
+                    file_info["timer"].cancel()
 
     def check_size(self, file_path):
         with self.lock:
@@ -0,0 +1,57 @@
+"""
+Benchmark: building and refreshing the alarm dashboard with many alarms.
+
+Fills an AlarmDashboard with N alarms from a state table, then applies
+bursts of state changes (as the repaint pass would) and times how long
+Tk takes to process them. Also counts the canvas items, which stay at
+one screenful of tiles whatever N is. Needs a display (or Xvfb).
+
+    python benchmarks/bench_dashboard.py --alarms 1000 --rounds 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard import AlarmDashboard, alarm_title
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alarms", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=200, help="alarms changing state per round")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    folders = [f"/recordings/site{i // 50:02d}/cam{i:04d}" for i in range(args.alarms)]
+
+    start = time.perf_counter()
+    dashboard = AlarmDashboard(root)
+    for key, folder in enumerate(folders):
+        dashboard.set_state(key, alarm_title(folder), "No file yet", "waiting")
+    root.update()
+    build_time = time.perf_counter() - start
+
+    random.seed(1)
+    start = time.perf_counter()
+    for round_number in range(args.rounds):
+        for key in random.sample(range(args.alarms), args.changes):
+            status = random.choice(("growing", "stopped"))
+            dashboard.set_state(key, alarm_title(folders[key]), f"segment_{round_number:05d}.mp4", status)
+        root.update()
+    refresh_time = (time.perf_counter() - start) / args.rounds
+
+    items = len(dashboard.canvas.find_all())
+    print(f"{args.alarms} alarms: build {build_time * 1000:.1f} ms, "
+          f"{args.changes} changes per round {refresh_time * 1000:.2f} ms, {items} canvas items")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: memory used per tracked file by the old and new per-file layouts.
+
+    alarm files   {"name", "size", "timer"} dict + parallel file_sizes dict
+                  vs. FileRecord (slots, interned directory)
+    files_info    dict of (size, last_change_time) tuples
+                  vs. FileTable (path -> row, sizes and times in arrays)
+
+Paths are built the way the scanner and watchdog produce them (one fresh
+string per event), spread over a few hundred camera folders. Memory is
+measured with tracemalloc and excludes the path strings used as keys,
+which both layouts need.
+
+    python benchmarks/bench_memory.py --files 200000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import FileRecord, FileTable
+
+
+def make_paths(count):
+    return [f"/mnt/dvr/site{i % 7}/cam{i % 300:03d}/2024-05-{i % 28 + 1:02d}/segment_{i:07d}.ts" for i in range(count)]
+
+
+def old_alarm_files(paths):
+    file_sizes = {}
+    files = {}
+    for i, path in enumerate(paths):
+        file_sizes[path] = i * 1024
+        files[path] = {"name": os.path.basename(path), "size": file_sizes[path], "timer": None}
+    return file_sizes, files
+
+
+def new_alarm_files(paths):
+    return {path: FileRecord(path, i * 1024) for i, path in enumerate(paths)}
+
+
+def old_files_info(paths):
+    now = time.time()
+    return {path: (i * 1024, now + i) for i, path in enumerate(paths)}
+
+
+def new_files_info(paths):
+    now = time.time()
+    table = FileTable()
+    for i, path in enumerate(paths):
+        table[path] = (i * 1024, now + i)
+    return table
+
+
+def measure(build, paths):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(paths)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200000)
+    args = parser.parse_args()
+
+    paths = make_paths(args.files)
+    print(f"{args.files} files")
+    for label, old, new in (
+        ("alarm files", old_alarm_files, new_alarm_files),
+        ("files_info", old_files_info, new_files_info),
+    ):
+        old_bytes = measure(old, paths)
+        new_bytes = measure(new, paths)
+        print(f"{label:>12}: old {old_bytes / args.files:6.1f} B/file  new {new_bytes / args.files:6.1f} B/file  "
+              f"({old_bytes / 2**20:.1f} MiB -> {new_bytes / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: keeping a large file table in time order while files change.
+
+    re-sort   sorted(files_info, key=lambda path: files_info[path][1]) after
+              every change, as the GUIs did on each refresh
+    ordered   FileTable.ordered_paths(), sorted once and then kept in order
+              with bisect as entries are inserted, changed or removed
+
+Each tick, --changed files grow (their change time becomes "now") and
+--added new files appear, like a recorder writing to many cameras.
+
+    python benchmarks/bench_order.py --files 1000000 --changed 64 --added 64 --ticks 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import FileTable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000000)
+    parser.add_argument("--changed", type=int, default=64, help="files that grow per tick")
+    parser.add_argument("--added", type=int, default=64, help="new files per tick")
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    now = time.time()
+    files_info = FileTable()
+    for i in range(args.files):
+        files_info[f"/mnt/dvr/cam{i % 64:02d}/segment_{i:07d}.ts"] = (i, now - args.files + i)
+    paths = list(files_info)
+    rng = random.Random(1)
+
+    started = time.perf_counter()
+    order = files_info.ordered_paths()
+    first_sort = time.perf_counter() - started
+
+    resort_total = ordered_total = 0.0
+    for tick in range(args.ticks):
+        now += 1
+        started = time.perf_counter()
+        for path in rng.sample(paths, args.changed):
+            files_info[path] = (files_info[path][0] + 1, now)
+        for i in range(args.added):
+            path = f"/mnt/dvr/cam{i:02d}/new_{tick:04d}_{i:03d}.ts"
+            files_info[path] = (0, now)
+            paths.append(path)
+        ordered_total += time.perf_counter() - started
+
+        started = time.perf_counter()
+        resorted = sorted(files_info, key=lambda path: files_info[path][1])
+        resort_total += time.perf_counter() - started
+
+    assert [files_info[path][1] for path in order] == [files_info[path][1] for path in resorted]
+    print(f"{len(files_info)} files, {args.changed} changed + {args.added} added per tick")
+    print(f"   first sort: {first_sort * 1000:8.1f} ms (once)")
+    print(f"      re-sort: {resort_total / args.ticks * 1000:8.1f} ms per tick")
+    print(f"      ordered: {ordered_total / args.ticks * 1000:8.1f} ms per tick (including the table updates)")
+
+
+if __name__ == "__main__":
+    main()
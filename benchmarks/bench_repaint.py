@@ -0,0 +1,80 @@
+"""
+Benchmark: queued Tk callbacks and popup repaints under bursty alarm updates.
+
+Worker threads report alarm state changes as fast as the engine would
+during heavy writes. "batched" uses FileMonitorOI's dirty-state painter;
+"legacy" queues one root.after(0, ...) per report like the old handler.
+Reports peak and final length of Tk's after queue and the repaints done.
+Needs a display (or Xvfb).
+
+    python benchmarks/bench_repaint.py --alarms 20 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FileMonitorOI import FileMonitorApp
+
+
+def run(mode, alarm_count, seconds, reports_per_second):
+    root = tk.Tk()
+    root.withdraw()
+    app = FileMonitorApp(root)
+    alarms = [{"id": i, "folder": f"/recordings/cam{i:02d}", "watch": i, "popup": None} for i in range(alarm_count)]
+    stop = threading.Event()
+    reports = [0]
+
+    def report(alarm):
+        if mode == "batched":
+            app.on_alarm_state(alarm, f"segment_{reports[0] // 50}.mp4", True)
+        else:
+            root.after(0, app.show_alarm_popup, alarm, f"segment_{reports[0] // 50}.mp4", True)
+        reports[0] += 1
+
+    def producer(alarm):
+        delay = 1.0 / reports_per_second
+        while not stop.is_set():
+            report(alarm)
+            time.sleep(delay)
+
+    threads = [threading.Thread(target=producer, args=(alarm,), daemon=True) for alarm in alarms]
+    for thread in threads:
+        thread.start()
+
+    peak_queue = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        root.update()
+        peak_queue = max(peak_queue, len(root.tk.splitlist(root.tk.call("after", "info"))))
+    stop.set()
+    final_queue = len(root.tk.splitlist(root.tk.call("after", "info")))
+    for thread in threads:
+        thread.join()
+
+    app.engine.shutdown()
+    root.destroy()
+    return reports[0], app.repaints, peak_queue, final_queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alarms", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=int, default=200, help="state reports per second per alarm")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())  # Keep setup.json and the history log out of the working tree
+    print(f"{args.alarms} alarms, {args.rate} reports/s each, {args.seconds}s")
+    for mode in ("batched", "legacy"):
+        reports, repaints, peak_queue, final_queue = run(mode, args.alarms, args.seconds, args.rate)
+        print(f"{mode:>8}: {reports:7d} reports  {repaints:6d} repaints  peak after-queue {peak_queue:6d}  final {final_queue:6d}")
+
+
+if __name__ == "__main__":
+    main()
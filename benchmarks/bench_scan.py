@@ -0,0 +1,113 @@
+"""
+Benchmark: serial vs parallel IncrementalScanner passes on a slow filesystem.
+
+Builds a folder tree in a temp dir and adds a fixed delay to every
+directory stat, listing and file stat made by the scanner, to simulate
+the round trips of an SMB/NFS share. Times a full first pass and checks
+that every worker count produces the same files_info and change lists.
+
+    python benchmarks/bench_scan.py --dirs 50 --files 40 --latency 2 --workers 1 4 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scanner
+from scanner import IncrementalScanner
+
+
+class SlowEntry:
+    """DirEntry whose stat() pays the simulated round trip."""
+
+    def __init__(self, entry, latency):
+        self.entry = entry
+        self.path = entry.path
+        self.latency = latency
+
+    def is_dir(self, follow_symlinks=True):
+        return self.entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self):
+        return self.entry.is_file()
+
+    def stat(self):
+        time.sleep(self.latency)
+        return self.entry.stat()
+
+
+class SlowScandir:
+    def __init__(self, path, latency):
+        time.sleep(latency)
+        self.entries = [SlowEntry(entry, latency) for entry in os.scandir(path)]
+
+    def __enter__(self):
+        return iter(self.entries)
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SlowOS:
+    """Stand-in for the os module as seen by scanner.py."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.path = self
+
+    def stat(self, path):
+        time.sleep(self.latency)
+        return os.stat(path)
+
+    def scandir(self, path):
+        return SlowScandir(path, self.latency)
+
+    def getsize(self, path):
+        time.sleep(self.latency)
+        return os.path.getsize(path)
+
+
+def build_tree(root, dir_count, files_per_dir):
+    for d in range(dir_count):
+        dir_path = os.path.join(root, f"cam{d // 10:02d}", f"ch{d:03d}")
+        os.makedirs(dir_path)
+        for f in range(files_per_dir):
+            with open(os.path.join(dir_path, f"segment_{f:05d}.ts"), "wb") as segment:
+                segment.write(b"x" * (f + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dirs", type=int, default=50)
+    parser.add_argument("--files", type=int, default=40, help="files per directory")
+    parser.add_argument("--latency", type=float, default=2.0, help="milliseconds added to every filesystem call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    build_tree(root, args.dirs, args.files)
+    scanner.os = SlowOS(args.latency / 1000)
+    print(f"{args.dirs * args.files} files in {args.dirs} dirs, {args.latency} ms per call")
+
+    baseline = None
+    serial_time = None
+    for workers in args.workers:
+        tracker = IncrementalScanner(workers=workers)
+        files_info = {}
+        start = time.perf_counter()
+        added, changed, removed = tracker.scan(root, files_info)
+        elapsed = time.perf_counter() - start
+        tracker.close()
+
+        result = ({path: info[0] for path, info in files_info.items()}, added, changed, removed)
+        if baseline is None:
+            baseline, serial_time = result, elapsed
+        same = "same result" if result == baseline else "RESULT DIFFERS"
+        print(f"{workers:3d} workers: {elapsed:7.2f}s  {serial_time / elapsed:5.1f}x  {len(added)} files  {same}")
+
+
+if __name__ == "__main__":
+    main()
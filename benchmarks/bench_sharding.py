@@ -0,0 +1,88 @@
+"""
+Benchmark: alarm event throughput in one process vs. sharded over worker processes.
+
+Creates one folder per alarm in a temp dir and has writer processes drop
+short segment files into all of them as fast as they can. Measures how long
+it takes until every file has been seen (has reached the file history),
+for a plain MonitorEngine and for ShardedEngine with each worker count.
+On a single core the workers only add overhead; the gain needs one core
+per worker plus the writers.
+
+    python benchmarks/bench_sharding.py --alarms 64 --files 100 --workers 0 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import MonitorEngine
+from sharding import ShardedEngine
+
+
+def write_files(folders, files, tag):
+    for i in range(files):
+        for folder in folders:
+            with open(os.path.join(folder, f"{tag}_{i:05d}.ts"), "wb") as segment:
+                segment.write(b"x" * 188)
+
+
+def run(folders, files, workers, writers, tag):
+    if workers:
+        engine = ShardedEngine(workers, history_file=None, state_file=None)
+    else:
+        engine = MonitorEngine(history_file=None, state_file=None)
+    alarms = [engine.new_alarm(folder) for folder in folders]
+    engine.start_alarms(alarms)
+    time.sleep(0.5)  # Let the watches settle before the burst
+
+    total = len(folders) * files
+    started = time.perf_counter()
+    processes = [
+        multiprocessing.Process(target=write_files, args=(folders[i::writers], files, tag))
+        for i in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    deadline = started + 120
+    while len(engine.file_history) < total and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    seen = len(engine.file_history)
+    raw_events, handled_events = engine.event_counts()
+    for process in processes:
+        process.join()
+    for alarm in alarms:
+        engine.stop_alarm(alarm)
+    engine.shutdown()
+    return elapsed, seen, raw_events, handled_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alarms", type=int, default=64)
+    parser.add_argument("--files", type=int, default=100, help="files written into each alarm folder")
+    parser.add_argument("--writers", type=int, default=4, help="writer processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4, 8], help="0 runs in-process")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        folders = []
+        for a in range(args.alarms):
+            folders.append(os.path.join(root, f"cam{a:03d}"))
+            os.makedirs(folders[-1])
+
+        total = args.alarms * args.files
+        print(f"{args.alarms} alarms, {total} files, {args.writers} writers, {os.cpu_count()} CPUs")
+        for workers in args.workers:
+            elapsed, seen, raw_events, handled_events = run(folders, args.files, workers, args.writers, f"w{workers}")
+            label = "in-process" if workers == 0 else f"{workers} workers"
+            print(f"{label:>11}: {seen}/{total} files in {elapsed:6.2f} s ({seen / elapsed:8.0f} files/s), "
+                  f"{raw_events} raw / {handled_events} handled events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: thread count and CPU for many concurrently growing files.
+
+Simulates N files that keep growing for a few rounds and then settle, and
+runs the same "still growing" vs "settled" check with either the shared
+SizeCheckScheduler or one threading.Timer per file (the old behaviour).
+
+    python benchmarks/bench_stability.py --files 10000
+    python benchmarks/bench_stability.py --files 10000 --mode timer
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stability import SizeCheckScheduler
+
+
+class GrowingFiles:
+    """In-memory stand-in for files that grow `rounds` times before settling."""
+
+    def __init__(self, count, rounds):
+        self.sizes = {f"file_{i:05d}.mp4": 0 for i in range(count)}
+        self.writes_left = {path: rounds for path in self.sizes}
+        self.lock = threading.Lock()
+        self.settled = 0
+        self.done = threading.Event()
+
+    def getsize(self, path):
+        with self.lock:
+            if self.writes_left[path] > 0:
+                self.writes_left[path] -= 1
+                self.sizes[path] += 1024
+            return self.sizes[path]
+
+
+def run(mode, count, rounds, delay):
+    files = GrowingFiles(count, rounds)
+    last_sizes = dict(files.sizes)
+    scheduler = SizeCheckScheduler() if mode == "scheduler" else None
+    peak_threads = threading.active_count()
+
+    def start_size_check(path):
+        if scheduler:
+            scheduler.schedule(delay, check_size, path)
+        else:
+            timer = threading.Timer(delay, check_size, args=(path,))
+            timer.start()
+
+    def check_size(path):
+        size = files.getsize(path)
+        if size == last_sizes[path]:
+            with files.lock:
+                files.settled += 1
+                if files.settled == count:
+                    files.done.set()
+        else:
+            last_sizes[path] = size
+            start_size_check(path)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for path in files.sizes:
+        start_size_check(path)
+
+    while not files.done.wait(0.05):
+        peak_threads = max(peak_threads, threading.active_count())
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    if scheduler:
+        scheduler.stop()
+    return peak_threads, cpu, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3, help="size changes per file before it settles")
+    parser.add_argument("--delay", type=float, default=0.5, help="settle check delay in seconds")
+    parser.add_argument("--mode", choices=["scheduler", "timer", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["scheduler", "timer"] if args.mode == "both" else [args.mode]
+    print(f"{args.files} files, {args.rounds} growth rounds, {args.delay}s check delay")
+    for mode in modes:
+        peak_threads, cpu, wall = run(mode, args.files, args.rounds, args.delay)
+        print(f"{mode:>9}: peak threads {peak_threads:6d}  cpu {cpu:7.2f}s  wall {wall:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
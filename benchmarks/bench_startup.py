@@ -0,0 +1,74 @@
+"""
+Benchmark: starting many alarms one by one vs. MonitorEngine.start_alarms.
+
+Builds one folder tree per camera in a temp dir and adds a fixed delay to
+every inotify watch that is set up, to simulate the disk round trips of a
+cold directory cache. Recursive native watches walk their whole tree, so
+this is what dominates starting thousands of alarms. Prints the wall time
+and the per-alarm startup times for each configuration:
+
+    serial         workers=1 (the old start_alarm loop)
+    parallel       parallel workers, each adding its watches to the shared inotify fd
+
+Linux only (inotify).
+
+    python benchmarks/bench_startup.py --alarms 64 --dirs 20 --latency 2 --workers 16
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import watchdog.observers.inotify_c as inotify_c
+
+import observers
+from engine import MonitorEngine, folders_from_glob
+
+
+def slow_add_watch(add_watch, latency):
+    def wrapper(fd, path, mask):
+        time.sleep(latency)
+        return add_watch(fd, path, mask)
+    return wrapper
+
+
+def run(folders, workers):
+    engine = MonitorEngine(history_file=":memory:", state_file=None)
+    alarms = [engine.new_alarm(folder, observers.BACKEND_NATIVE) for folder in folders]
+    started = time.perf_counter()
+    startup_times = engine.start_alarms(alarms, workers=workers)
+    elapsed = time.perf_counter() - started
+    for alarm in alarms:
+        engine.stop_alarm(alarm)
+    engine.shutdown()
+    return elapsed, sorted(startup_times.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alarms", type=int, default=64)
+    parser.add_argument("--dirs", type=int, default=20, help="sub-folders per alarm folder")
+    parser.add_argument("--latency", type=float, default=2.0, help="milliseconds added to every inotify watch")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    inotify_c.inotify_add_watch = slow_add_watch(inotify_c.inotify_add_watch, args.latency / 1000)
+    with tempfile.TemporaryDirectory() as root:
+        for a in range(args.alarms):
+            for d in range(args.dirs):
+                os.makedirs(os.path.join(root, f"cam{a:03d}", "recordings", f"day{d:02d}"))
+        folders = folders_from_glob(os.path.join(root, "*", "recordings"))
+
+        print(f"{len(folders)} alarms, {args.dirs + 1} watches each, {args.latency} ms per watch")
+        for label, workers in (("serial", 1), ("parallel", args.workers)):
+            elapsed, times = run(folders, workers)
+            print(f"{label:>8}: {elapsed:6.2f} s total, per alarm median {statistics.median(times) * 1000:7.1f} ms, "
+                  f"max {times[-1] * 1000:7.1f} ms, {len(times)} started")
+
+
+if __name__ == "__main__":
+    main()
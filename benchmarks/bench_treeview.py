@@ -0,0 +1,57 @@
+"""
+Benchmark: FileTracker2.update_treeview refresh cost with a large file table.
+
+Fills files_info with synthetic entries (same basenames in different
+subfolders included) and times the first refresh, an unchanged refresh and
+a refresh where 1% of the files grew. Needs a display (or Xvfb).
+
+    python benchmarks/bench_treeview.py --rows 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FileTracker2 import FileMonitorApp
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    func()
+    print(f"{label:>22}: {time.perf_counter() - start:8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction of files that grow between refreshes")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    app = FileMonitorApp(root)
+
+    now = time.time()
+    paths = [os.path.join("/recordings", f"cam{i % 64:02d}", f"segment_{i // 64:05d}.mp4") for i in range(args.rows)]
+    for i, path in enumerate(paths):
+        app.files_info[path] = (i * 1024, now - 3600 + i * 0.01)
+
+    print(f"{args.rows} rows")
+    timed("initial fill", app.update_treeview)
+    timed("unchanged refresh", app.update_treeview)
+
+    step = max(1, int(1 / args.changed)) if args.changed else len(paths) + 1
+    for path in paths[::step]:
+        size, _ = app.files_info[path]
+        app.files_info[path] = (size + 1, time.time())
+    timed(f"{args.changed:.0%} changed refresh", app.update_treeview)
+
+    assert len(app.tree.get_children()) == args.rows
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+
+
+STATUS_COLORS = {
+    "growing": "#007600",  # Same green and red as the alarm popups
+    "stopped": "#8B0000",
+    "waiting": "#505050",  # Monitoring, no file seen yet
+    "off": "#A0A0A0",
+}
+
+
+class AlarmDashboard(tk.Toplevel):
+    """One window showing the state of every alarm as a grid of coloured tiles.
+
+    The dashboard keeps a state table (alarm id -> (title, file name,
+    status)) and, like VirtualFileList, only draws the tiles that fit in the
+    window: a fixed pool of canvas items is re-pointed at whichever alarms
+    are scrolled into view and only rewritten when their state changed.
+    Updating an alarm that is scrolled out of view is a dict write, so the
+    cost of a refresh does not grow with the number of alarms.
+    """
+
+    TILE_WIDTH = 200
+    TILE_HEIGHT = 56
+    GAP = 4
+
+    def __init__(self, master, on_close=None):
+        super().__init__(master)
+        self.title("Alarm Dashboard")
+        self.geometry("840x600")
+        self.on_close = on_close
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.states = {}  # alarm id -> (title, file name, status)
+        self.keys = []  # alarm ids in display order
+        self.positions = {}  # alarm id -> index in self.keys
+        self.counts = dict.fromkeys(STATUS_COLORS, 0)
+        self.columns = 1
+        self.visible_rows = 1
+        self.first_row = 0  # Index of the first grid row in view
+        self.slots = []  # (rectangle, title text, file text) canvas items, one per visible tile
+        self.shown = []  # State currently drawn in each slot, None when the slot is hidden
+        self.refresh_pending = False
+
+        self.summary = tk.Label(self, anchor="w")
+        self.summary.pack(side="top", fill="x", padx=5)
+        self.canvas = tk.Canvas(self, bg="#202020", highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_to(self.first_row - 1))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_to(self.first_row + 1))
+
+    def close(self):
+        if self.on_close:
+            self.on_close()
+        self.destroy()
+
+    def set_state(self, key, title, file_name, status):
+        """Record the state of one alarm, adding a tile for it if it is new."""
+        state = (title, file_name, status)
+        previous = self.states.get(key)
+        if previous == state:
+            return
+        if previous is None:
+            self.positions[key] = len(self.keys)
+            self.keys.append(key)
+        else:
+            self.counts[previous[2]] -= 1
+        self.counts[status] += 1
+        self.states[key] = state
+        if previous is None or self.is_visible(key):
+            self.schedule_refresh()
+        else:
+            self.update_summary()
+
+    def remove(self, *keys):
+        """Drop the tiles of the given alarms in one pass."""
+        removed = False
+        for key in keys:
+            state = self.states.pop(key, None)
+            if state is not None:
+                self.counts[state[2]] -= 1
+                removed = True
+        if not removed:
+            return
+        self.keys = [key for key in self.keys if key in self.states]
+        self.positions = {key: index for index, key in enumerate(self.keys)}
+        self.schedule_refresh()
+
+    def is_visible(self, key):
+        first = self.first_row * self.columns
+        return first <= self.positions[key] < first + len(self.slots)
+
+    def schedule_refresh(self):
+        # Coalesce many updates from one repaint pass into a single redraw
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def refresh(self):
+        """Redraw the tiles in view, touching only the slots whose alarm or state changed."""
+        self.refresh_pending = False
+        if not self.winfo_exists():
+            return  # Closed while a refresh was queued
+        first = self.first_row * self.columns
+        for slot, items in enumerate(self.slots):
+            index = first + slot
+            state = self.states[self.keys[index]] if index < len(self.keys) else None
+            if self.shown[slot] == state:
+                continue
+            rect, title_item, file_item = items
+            if state is None:
+                for item in items:
+                    self.canvas.itemconfigure(item, state="hidden")
+            else:
+                title, file_name, status = state
+                self.canvas.itemconfigure(rect, fill=STATUS_COLORS[status], state="normal")
+                self.canvas.itemconfigure(title_item, text=title, state="normal")
+                self.canvas.itemconfigure(file_item, text=file_name, state="normal")
+            self.shown[slot] = state
+        self.update_summary()
+        self.update_scrollbar()
+
+    def update_summary(self):
+        self.summary.config(text=(
+            f"{len(self.keys)} alarms: {self.counts['growing']} growing, {self.counts['stopped']} stopped, "
+            f"{self.counts['waiting']} waiting, {self.counts['off']} off"
+        ))
+
+    def update_scrollbar(self):
+        total_rows = max(1, -(-len(self.keys) // self.columns))
+        self.scrollbar.set(self.first_row / total_rows, min(1.0, (self.first_row + self.visible_rows) / total_rows))
+
+    def on_resize(self, event):
+        columns = max(1, (event.width + self.GAP) // (self.TILE_WIDTH + self.GAP))
+        visible_rows = max(1, -(-(event.height + self.GAP) // (self.TILE_HEIGHT + self.GAP)))  # Include a partly visible row
+        if (columns, visible_rows) == (self.columns, self.visible_rows) and self.slots:
+            return
+        self.columns, self.visible_rows = columns, visible_rows
+
+        # Rebuild the slot pool for the new grid; at most a screenful of tiles
+        self.canvas.delete("all")
+        self.slots = []
+        for slot in range(columns * visible_rows):
+            x = (slot % columns) * (self.TILE_WIDTH + self.GAP)
+            y = (slot // columns) * (self.TILE_HEIGHT + self.GAP)
+            self.slots.append((
+                self.canvas.create_rectangle(x, y, x + self.TILE_WIDTH, y + self.TILE_HEIGHT, outline="", state="hidden"),
+                self.canvas.create_text(x + 6, y + 6, anchor="nw", fill="white", font=("Arial", 9, "bold"),
+                                        width=self.TILE_WIDTH - 12, state="hidden"),
+                self.canvas.create_text(x + 6, y + 26, anchor="nw", fill="white", font=("Arial", 11),
+                                        width=self.TILE_WIDTH - 12, state="hidden"),
+            ))
+        self.shown = [None] * len(self.slots)
+        self.scroll_to(self.first_row)
+
+    def scroll_to(self, row):
+        total_rows = -(-len(self.keys) // self.columns)
+        self.first_row = max(0, min(row, total_rows - self.visible_rows + 1))
+        self.refresh()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        total_rows = -(-len(self.keys) // self.columns)
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * total_rows))
+        elif unit == "pages":
+            self.scroll_to(self.first_row + int(amount) * self.visible_rows)
+        else:
+            self.scroll_to(self.first_row + int(amount))
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_to(self.first_row - steps)
+
+
+def alarm_title(folder):
+    """Short tile title for an alarm folder: its last two path components."""
+    parts = os.path.normpath(folder).split(os.sep)
+    return os.sep.join(parts[-2:])
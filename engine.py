@@ -0,0 +1,627 @@
+"""
+Monitoring engine shared by the GUI apps and the headless daemon.
+
+Nothing in here imports tkinter, so the engine can run on recording servers
+without a display or be used as a library:
+
+    python engine.py --headless                  # alarms from setup.json
+    python engine.py --headless /mnt/dvr/ch01    # watch the given folders
+    python engine.py --headless --manifest cameras.csv
+    python engine.py --headless --workers 8      # alarms spread over 8 processes
+
+Without --headless the FileMonitorOI window is started as usual.
+"""
+import argparse
+import csv
+import glob
+import itertools
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from watchdog.events import FileSystemEventHandler
+
+from adaptive import AdaptiveInterval
+from filters import PathFilter
+from history import FileHistory
+from observers import SharedObserver, detect_backend
+from records import FileRecord, FileTable
+from scanner import IncrementalScanner
+from snapshot import load_snapshot, save_snapshot
+from stability import StabilityPolicy, get_open_writers, get_scheduler
+from statpool import StatTimeout, get_stat_pool
+
+
+SETUP_FILE = "setup.json"  # Define the file name for storing setup
+SETUP_VERSION = 2  # Version 1 files are a bare list of alarms
+HISTORY_FILE = "file_history.db"  # On-disk log of every file the alarms have seen
+POLL_MIN_INTERVAL = 0.5  # Seconds between polls while files in a polled folder are changing
+POLL_MAX_INTERVAL = 10.0  # Upper bound for the poll interval of an idle polled folder
+COALESCE_WINDOW = 0.5  # Seconds over which repeated modified events for one file are merged
+STATE_FILE = "alarm_state.json.gz"  # Files still growing per alarm, reloaded on the next start
+SCAN_STATE_FILE = "scan_state.json.gz"  # FolderTracker's file table, reloaded on the next start
+START_WORKERS = 16  # Threads used to start alarms in bulk
+FILTER_KEYS = ("include", "exclude", "extensions", "prune")
+
+log = logging.getLogger("filemonitor")
+
+
+def read_setup(path=SETUP_FILE):
+    """Return the list of saved alarms ({"folder", "active", "backend", "filters", "stability"}), or [] if there is none.
+
+    Raises ValueError if the file cannot be read or was written by a newer
+    version, so callers do not overwrite it with an empty setup.
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r') as setup_file:
+            data = json.load(setup_file)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Could not read setup {path}: {e}")
+    if isinstance(data, list):
+        alarms_data = data  # Version 1
+    elif not isinstance(data, dict):
+        raise ValueError(f"Malformed setup file {path}: expected an object, got {type(data).__name__}")
+    elif data.get("version") != SETUP_VERSION:
+        raise ValueError(f"Setup {path} has unsupported version {data.get('version')}")
+    else:
+        alarms_data = data.get("alarms")
+        if not isinstance(alarms_data, list):
+            raise ValueError(f"Malformed setup file {path}: \"alarms\" must be a list")
+    for alarm_data in alarms_data:
+        if not isinstance(alarm_data, dict) or not isinstance(alarm_data.get("folder"), str) or "active" not in alarm_data:
+            raise ValueError(f"Malformed setup file {path}: bad alarm entry {alarm_data!r}")
+    return alarms_data
+
+
+def write_setup(setup_data, path=SETUP_FILE):
+    """Save the alarms to path, replacing the old file atomically so a crash never leaves half a setup."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as setup_file:
+        # One compact line per alarm: quick to write for thousands of alarms, still diffable
+        lines = [json.dumps(alarm_data, separators=(",", ":")) for alarm_data in setup_data]
+        setup_file.write(f'{{"version": {SETUP_VERSION}, "alarms": [' + "".join(f"\n{line}," for line in lines).rstrip(",") + "\n]}\n")
+        setup_file.flush()
+        os.fsync(setup_file.fileno())  # On disk before the rename makes it the setup
+    os.replace(tmp_path, path)
+
+
+def folders_from_glob(pattern):
+    """Return the folders matching a glob such as /mnt/dvr/*/recordings, sorted."""
+    return sorted(path for path in glob.glob(os.path.expanduser(pattern)) if os.path.isdir(path))
+
+
+def _parse_active(value):
+    if isinstance(value, str):
+        return value.strip().lower() not in ("0", "false", "no", "off")
+    return bool(value)
+
+
+def read_manifest(path):
+    """Read alarms to import from a CSV or JSON manifest, in the setup.json format.
+
+    CSV: a header row with a "folder" column and optional "active", "backend"
+    and filter columns (include, exclude, extensions, prune) holding
+    space-separated patterns. JSON: a list of folder strings or of setup.json
+    entries. Imported alarms are active unless the manifest says otherwise.
+    """
+    with open(path, newline='') as manifest_file:
+        if path.lower().endswith(".json"):
+            rows = json.load(manifest_file)
+        else:
+            rows = list(csv.DictReader(manifest_file))
+
+    alarms_data = []
+    for row in rows:
+        if isinstance(row, str):
+            row = {"folder": row}
+        folder = (row.get("folder") or "").strip()
+        if not folder:
+            continue
+        filters = row.get("filters")
+        if filters is None:
+            filters = {key: row[key].split() for key in FILTER_KEYS if row.get(key)}
+        alarms_data.append({
+            "folder": folder,
+            "active": _parse_active(row.get("active", True)),
+            "backend": row.get("backend") or None,
+            "filters": filters,
+            "stability": row.get("stability"),
+        })
+    return alarms_data
+
+
+class MonitorEngine:
+    """Watch alarm folders and report when the latest file starts or stops growing.
+
+    Alarms are plain dicts so front ends can attach their own keys (the GUI
+    keeps its BooleanVar and popup window on the same dict). State changes
+    are reported through on_state_change(alarm, file_name, changing), which
+    is called from engine threads; GUIs must hand it over to their main loop.
+    """
+
+    def __init__(self, on_state_change=None, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+                 history_file=HISTORY_FILE, coalesce_window=COALESCE_WINDOW, state_file=STATE_FILE, file_history=None):
+        self.on_state_change = on_state_change
+        self.observer = SharedObserver(min_interval, max_interval, coalesce_window)  # One observer shared by every alarm
+        # Bounded in memory, full log on disk; worker processes pass an object that forwards entries instead
+        self.file_history = file_history if file_history is not None else FileHistory(history_file)
+        self.state_file = state_file
+        saved = load_snapshot(state_file) or {}
+        self.alarm_states = saved.get("alarms", {})  # folder -> {"files": {path: size}, "last": [file name, changing]}
+        self.alarm_ids = itertools.count(1)
+
+    def new_alarm(self, folder, backend=None, filters=None, stability=None):
+        return {
+            "id": next(self.alarm_ids),  # Stable key for front ends, unlike the position in a list
+            "folder": folder,
+            "backend": backend or detect_backend(folder),  # Native events on local disks, polling on network shares
+            "filter": PathFilter.from_config(filters),  # Files and folders this alarm ignores
+            "policy": StabilityPolicy.from_config(stability),  # When a growing file counts as finished
+            "watch": None,  # Watch id in the shared observer while monitoring
+            "running_backend": None,  # Backend actually in use while monitoring; native can fall back to polling
+            "handler": None,
+            "files": {},  # file path -> FileRecord for files being size-checked
+            "last": None  # Last reported [file name, changing]
+        }
+
+    def start_alarm(self, alarm):
+        event_handler = FileChangeHandler(self, alarm)
+        alarm["handler"] = event_handler
+        if alarm["folder"] in self.alarm_states:
+            event_handler.restore_state(self.alarm_states[alarm["folder"]])  # Pick up where the last run stopped
+        alarm["watch"] = self.observer.schedule(
+            event_handler, alarm["folder"], recursive=True, backend=alarm["backend"], path_filter=alarm["filter"]
+        )  # Enable recursive monitoring
+        # Native watches can fall back to polling; alarm["backend"] stays as configured, so the next start tries again
+        alarm["running_backend"] = self.observer.backend_of(alarm["watch"])
+
+        # Start the shared observer on the first active alarm
+        if not self.observer.is_alive():
+            self.observer.start()
+
+    def start_alarms(self, alarms, workers=START_WORKERS):
+        """Start many alarms at once and return {alarm id: seconds its start took}.
+
+        A recursive native watch walks the whole folder tree when it is set
+        up, so the alarms are started on a thread pool. Alarms that fail to
+        start are logged, left stopped and missing from the result.
+        """
+        if not self.observer.is_alive():
+            self.observer.start()  # Started first so every watch is set up as soon as it is scheduled
+
+        def start(alarm):
+            started = time.perf_counter()
+            self.start_alarm(alarm)
+            return time.perf_counter() - started
+
+        startup_times = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AlarmStart") as pool:
+            futures = [(alarm, pool.submit(start, alarm)) for alarm in alarms]
+            for alarm, future in futures:
+                try:
+                    startup_times[alarm["id"]] = future.result()
+                except Exception as e:
+                    log.warning("Could not start %s: %s", alarm["folder"], e)
+                    self.stop_alarm(alarm)
+        return startup_times
+
+    def stop_alarm(self, alarm):
+        # Stop routing events to this alarm; other alarms keep running
+        if alarm["watch"] is not None:
+            self.observer.unschedule(alarm["watch"])
+            alarm["watch"] = None
+            alarm["running_backend"] = None
+
+        # Cancel pending size checks so they don't fire after the alarm is stopped
+        if alarm["handler"]:
+            alarm["handler"].cancel_size_checks()
+            self.alarm_states[alarm["folder"]] = alarm["handler"].export_state()
+            alarm["handler"] = None
+
+    def event_counts(self):
+        """Return (raw filesystem events, events handled after coalescing)."""
+        return self.observer.event_counts()
+
+    def shutdown(self):
+        self.observer.stop()
+        self.file_history.close()
+        if self.state_file:
+            save_snapshot({"alarms": self.alarm_states}, self.state_file)
+
+    def notify(self, alarm, file_name, changing):
+        alarm["last"] = [file_name, changing]
+        if self.on_state_change:
+            self.on_state_change(alarm, file_name, changing)
+
+
+# Custom event handler to monitor file system events
+class FileChangeHandler(FileSystemEventHandler):
+    MAX_CLOSED = 64  # Files finished by a close-write that are remembered in case they are reopened
+
+    def __init__(self, engine, alarm):
+        self.engine = engine
+        self.alarm = alarm
+        self.files = alarm["files"]  # file path -> FileRecord for every file being size-checked
+        self.policy = alarm["policy"]
+        self.closed = OrderedDict()  # file path -> FileRecord finished by a close-write, oldest first
+        self.pending_stats = {}  # file path -> [event stats in flight, close-write seen meanwhile]
+        self.stopped = False  # Set when the alarm stops; stats still in flight are then dropped
+        self.lock = threading.Lock()  # Guards self.files, self.closed and self.pending_stats; never held during file I/O
+        self.check_intervals = {}
+        self.scheduler = get_scheduler()  # One shared thread runs the size checks for every file
+        self.stat_pool = get_stat_pool()  # Stats run here so a hung mount never blocks the event or check threads
+
+    def after_stat(self, file_path, callback, *args):
+        """Stat file_path on the stat pool and call callback(stat_result, error, *args) once it is done.
+
+        Does not wait: the callback runs on the stat pool thread, or right away
+        with a StatTimeout if the pool refused the stat (hung mount, full queue).
+        """
+        try:
+            future = self.stat_pool.submit(file_path)
+        except StatTimeout as e:
+            callback(None, e, *args)
+            return
+        future.add_done_callback(lambda future: self._stat_done(future, callback, args))
+
+    def _stat_done(self, future, callback, args):
+        error = future.exception()
+        try:
+            callback(None if error else future.result(), error, *args)
+        except Exception:
+            log.exception("Error handling a file in %s", self.alarm["folder"])
+
+    def begin_event_stat(self, file_path):
+        # A close-write must not overtake the stats of earlier events for the same file
+        with self.lock:
+            self.pending_stats.setdefault(file_path, [0, False])[0] += 1
+
+    def end_event_stat(self, file_path):
+        with self.lock:
+            pending = self.pending_stats[file_path]
+            pending[0] -= 1
+            if pending[0]:
+                return
+            del self.pending_stats[file_path]
+        if pending[1]:
+            self.finish_closed(file_path)  # Held back until now by on_closed
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.begin_event_stat(event.src_path)
+            self.after_stat(event.src_path, self.finish_created, event.src_path)
+
+    def finish_created(self, stat_result, error, file_path):
+        try:
+            self.created(stat_result, error, file_path)
+        finally:
+            self.end_event_stat(file_path)
+
+    def created(self, stat_result, error, file_path):
+        if self.stopped:
+            return
+        if isinstance(error, FileNotFoundError):
+            return  # Gone before we could look at it
+        if error is not None:
+            log.warning("%s", error)
+            file_size = mtime = None  # Unknown until a size check gets through
+        else:
+            file_size, mtime = stat_result.st_size, stat_result.st_mtime_ns
+
+        record = FileRecord(file_path, file_size, mtime)
+        with self.lock:
+            self.files[file_path] = record
+
+        # Add file history with timestamp and size
+        self.engine.file_history.append(file_path, file_size or 0)
+
+        # Report the file as growing
+        self.engine.notify(self.alarm, record.name, changing=True)
+
+        # Start the size check timer
+        with self.lock:
+            if self.files.get(file_path) is record:
+                self.start_size_check(record)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            file_path = event.src_path
+            with self.lock:
+                if file_path not in self.files and file_path not in self.closed:
+                    return
+            self.begin_event_stat(file_path)
+            self.after_stat(file_path, self.finish_modified, file_path)
+
+    def finish_modified(self, stat_result, error, file_path):
+        try:
+            self.modified(stat_result, error, file_path)
+        finally:
+            self.end_event_stat(file_path)
+
+    def modified(self, stat_result, error, file_path):
+        if error is not None:
+            return  # The pending size check will look again
+        with self.lock:
+            if self.stopped:
+                return
+            record = self.files.get(file_path)
+            if record is None:
+                # A writer reopened a file it had closed (e.g. a logger appending line by line)
+                record = self.closed.pop(file_path, None)
+                if record is None:
+                    return  # Stopped tracking while we were waiting on the stat
+                self.files[file_path] = record
+                self.update_record(record, stat_result)
+            elif not self.update_record(record, stat_result):
+                return
+            # Reset the size check timer
+            if record.timer:
+                record.timer.cancel()
+            self.start_size_check(record)
+        # Report the file as still growing
+        self.engine.notify(self.alarm, record.name, changing=True)
+
+    def on_closed(self, event):
+        # IN_CLOSE_WRITE from the native observer: the writer is done, so don't wait for the size checks.
+        # Polled folders never get this event and keep using the checks alone.
+        if event.is_directory or not self.policy.close_write:
+            return
+        with self.lock:
+            pending = self.pending_stats.get(event.src_path)
+            if pending is not None:
+                pending[1] = True  # Finished by end_event_stat once the stats are in
+                return
+        self.finish_closed(event.src_path)
+
+    def finish_closed(self, file_path):
+        with self.lock:
+            if self.stopped:
+                return
+            record = self.files.get(file_path)
+            if record is None:
+                return
+        if self.policy.check_open_writers:
+            open_writers = get_open_writers()
+            if open_writers is not None and open_writers.is_open_for_writing(file_path):
+                return  # Another writer still has it open
+
+        with self.lock:
+            if self.files.get(file_path) is not record:
+                return
+            if record.timer:
+                record.timer.cancel()
+            del self.files[file_path]
+            self.closed[file_path] = record
+            if len(self.closed) > self.MAX_CLOSED:
+                self.closed.popitem(last=False)
+        # Report the file as stopped
+        self.engine.notify(self.alarm, record.name, changing=False)
+
+    def export_state(self):
+        with self.lock:
+            files = {file_path: record.size for file_path, record in self.files.items()}
+        return {"files": files, "last": self.alarm["last"]}
+
+    def restore_state(self, state):
+        """Track again the files that were still growing when the alarm was last stopped."""
+        with self.lock:
+            for file_path, size in state["files"].items():
+                record = FileRecord(file_path, size)
+                self.files[file_path] = record
+                # The size check sees whether they grew, stopped or vanished meanwhile
+                self.start_size_check(record)
+        if state.get("last"):
+            self.engine.notify(self.alarm, *state["last"])
+
+    def update_record(self, record, stat_result):
+        """Store a new sample and return whether it counts as a change; called with self.lock held."""
+        changed = stat_result.st_size != record.size
+        if self.policy.check_mtime and stat_result.st_mtime_ns != record.mtime:
+            changed = True
+        record.size = stat_result.st_size
+        record.mtime = stat_result.st_mtime_ns
+        if changed:
+            record.stable_samples = 0
+        return changed
+
+    def start_size_check(self, record):
+        # Sample again after the policy's quiet period; called with self.lock held
+        record.checks += 1
+        record.timer = self.scheduler.schedule(self.policy.quiet_period, self.check_size, record, record.checks)
+
+    def is_current_check(self, record, check):
+        # A check already taken off the heap cannot be cancelled, so a replaced one must notice itself; lock held
+        return not self.stopped and self.files.get(record.path) is record and record.checks == check
+
+    def cancel_size_checks(self):
+        # Drop any pending checks when monitoring stops
+        with self.lock:
+            self.stopped = True
+            for record in self.files.values():
+                if record.timer:
+                    record.timer.cancel()
+
+    def check_size(self, record, check):
+        with self.lock:
+            if not self.is_current_check(record, check):
+                return
+        self.after_stat(record.path, self.finish_check, record, check)
+
+    def finish_check(self, stat_result, error, record, check):
+        file_path = record.path
+        if isinstance(error, FileNotFoundError):
+            stat_result = None  # File might have been deleted before the check
+        elif error is not None:
+            # Mount is not answering; keep the file as it is and try again later
+            log.warning("%s", error)
+            with self.lock:
+                if self.is_current_check(record, check):
+                    self.start_size_check(record)
+            return
+
+        with self.lock:
+            if not self.is_current_check(record, check):
+                return
+            if stat_result is not None:
+                if self.update_record(record, stat_result):
+                    # Still changing; restart the timer
+                    self.start_size_check(record)
+                    return
+                record.stable_samples += 1
+            finished = stat_result is None or record.stable_samples >= self.policy.samples
+        if stat_result is not None and self.policy.check_open_writers:
+            open_writers = get_open_writers()
+            if open_writers is not None:
+                # A writer that still holds the file open is not done; one that closed it is
+                finished = not open_writers.is_open_for_writing(file_path)
+
+        with self.lock:
+            if not self.is_current_check(record, check):
+                return
+            if not finished:
+                self.start_size_check(record)
+                return
+            # Nothing changed for long enough (or the file is gone); stop monitoring this file
+            del self.files[file_path]
+        # Report the file as stopped
+        self.engine.notify(self.alarm, record.name, changing=False)
+
+
+class FolderTracker:
+    """Poll one folder tree and classify every file as logging or idle.
+
+    This is the polling model used by FileTracker2: files_info maps each path
+    to (size, last_change_time) and is updated in place on every poll(). A
+    file is "logging" while its size changed within the policy's settle time
+    (LOGGING_WINDOW seconds by default) or, with check_open_writers, while
+    some process still has it open for writing.
+    """
+
+    LOGGING_WINDOW = 10
+
+    def __init__(self, min_interval=0.5, max_interval=30.0, workers=1, path_filter=None, policy=None):
+        self.files_info = FileTable()
+        self.policy = policy or StabilityPolicy(quiet_period=self.LOGGING_WINDOW)
+        self.scanner = IncrementalScanner(workers=workers, path_filter=path_filter)  # workers > 1 stats in parallel, for network shares
+        self.interval = AdaptiveInterval(min_interval, max_interval)
+
+    def poll(self, folder):
+        """Scan folder and return (added, changed, removed) path lists."""
+        return self.scanner.scan(folder, self.files_info)
+
+    def set_filter(self, path_filter):
+        """Only track files accepted by path_filter; takes effect with a fresh scan on the next poll."""
+        self.scanner.set_filter(path_filter)
+
+    def load_state(self, folder, path=SCAN_STATE_FILE):
+        """Reload the file table saved for folder so the next poll only reports what changed since."""
+        if self.scanner.root == folder:
+            return False  # Already tracking it
+        return self.scanner.restore_state(load_snapshot(path), folder, self.files_info)
+
+    def save_state(self, path=SCAN_STATE_FILE):
+        if self.scanner.root is not None:
+            save_snapshot(self.scanner.export_state(self.files_info), path)
+
+    def next_delay(self, active):
+        """Delay in seconds until the next poll, following write activity."""
+        return self.interval.update(active)
+
+    def is_logging(self, file_path, now=None):
+        now = time.time() if now is None else now
+        if now - self.files_info[file_path][1] <= self.policy.settle_time:
+            return True
+        return self.policy.check_open_writers and file_path in self.open_for_writing()
+
+    def open_for_writing(self):
+        """Paths in the scanned folder that some process has open for writing (empty without /proc)."""
+        open_writers = get_open_writers()
+        if open_writers is None or self.scanner.root is None:
+            return ()
+        return open_writers.paths_under(self.scanner.root)
+
+
+def run_headless(setup_path, folders, manifest_path=None, workers=0):
+    """Run the alarms from setup_path (or the manifest, or the given folders) until interrupted, logging state changes."""
+    last_states = {}  # alarm folder -> (file name, changing) last logged
+
+    def log_transition(alarm, file_name, changing):
+        state = (file_name, changing)
+        if last_states.get(alarm["folder"]) == state:
+            return
+        last_states[alarm["folder"]] = state
+        log.info("%s: %s %s", alarm["folder"], file_name, "is growing" if changing else "stopped growing")
+
+    try:
+        saved_alarms = read_manifest(manifest_path) if manifest_path else ([] if folders else read_setup(setup_path))
+    except (OSError, ValueError) as e:
+        log.error("%s", e)
+        return 1
+    if workers:
+        from sharding import ShardedEngine  # Imports this module
+        engine = ShardedEngine(workers, on_state_change=log_transition)
+    else:
+        engine = MonitorEngine(on_state_change=log_transition)
+    if folders:
+        alarms = [engine.new_alarm(folder) for folder in folders]
+    else:
+        alarms = [
+            engine.new_alarm(alarm_data["folder"], alarm_data.get("backend"), alarm_data.get("filters"), alarm_data.get("stability"))
+            for alarm_data in saved_alarms
+            if alarm_data["active"]
+        ]
+    if not alarms:
+        log.error("No active alarms in %s and no folders given", manifest_path or setup_path)
+        engine.shutdown()
+        return 1
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    started = time.perf_counter()
+    startup_times = engine.start_alarms(alarms)
+    for alarm in alarms:
+        if alarm["id"] in startup_times:
+            log.info("Watching %s (%s, started in %.1f ms)", alarm["folder"], alarm["running_backend"], startup_times[alarm["id"]] * 1000)
+    log.info("Started %d of %d alarms in %.2f s", len(startup_times), len(alarms), time.perf_counter() - started)
+
+    while not stop_event.wait(1.0):
+        pass  # Wake up regularly so signals are handled on every platform
+    raw_events, handled_events = engine.event_counts()
+    log.info("Shutting down (%d raw events, %d handled after coalescing)", raw_events, handled_events)
+    for alarm in alarms:
+        engine.stop_alarm(alarm)
+    engine.shutdown()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch folders and alarm when files stop growing.")
+    parser.add_argument("--headless", action="store_true", help="run without a GUI and log state changes")
+    parser.add_argument("--setup", default=SETUP_FILE, help="setup file with the alarms to run (default: %(default)s)")
+    parser.add_argument("--manifest", help="CSV or JSON manifest with the alarms to run instead of the setup file")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run the alarms in this many worker processes instead of in-process (default: %(default)s)")
+    parser.add_argument("folders", nargs="*", help="folders (or quoted globs) to watch instead of the alarms in the setup file")
+    args = parser.parse_args()
+
+    if not args.headless:
+        from FileMonitorOI import main as gui_main  # Only the GUI needs tkinter
+        gui_main(args.workers)
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    folders = [folder for pattern in args.folders for folder in (folders_from_glob(pattern) if glob.has_magic(pattern) else [pattern])]
+    return run_headless(args.setup, folders, args.manifest, args.workers)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+import fnmatch
+import os
+import re
+
+
+REGEX_PREFIX = "re:"  # Patterns starting with this are regular expressions searched in the full path
+
+
+def parse_patterns(text):
+    """Split a whitespace-separated pattern list as typed in the GUI."""
+    return text.split()
+
+
+def _compile(patterns):
+    """Compile globs (matched against the file or folder name) and re: regexes (searched in the path).
+
+    Returns (name regex or None, path regex or None).
+    """
+    globs = [fnmatch.translate(pattern) for pattern in patterns if not pattern.startswith(REGEX_PREFIX)]
+    regexes = [f"(?:{pattern[len(REGEX_PREFIX):]})" for pattern in patterns if pattern.startswith(REGEX_PREFIX)]
+    name_re = re.compile("|".join(globs), re.IGNORECASE) if globs else None
+    path_re = re.compile("|".join(regexes)) if regexes else None
+    return name_re, path_re
+
+
+def _matches(compiled, path, name):
+    name_re, path_re = compiled
+    return bool((name_re and name_re.match(name)) or (path_re and path_re.search(path)))
+
+
+class PathFilter:
+    """Include/exclude rules deciding which files a scan or an alarm looks at.
+
+    include / exclude: globs matched against the file name, or "re:<regex>"
+        searched in the full path. With include rules a file must match one.
+    extensions: e.g. ["mp4", ".ts"]; a file must have one of them.
+    prune: globs or re: patterns for folders that are never entered.
+
+    All patterns are compiled into a few regexes up front, so checking a
+    path costs at most one regex match per rule kind.
+    """
+
+    def __init__(self, include=(), exclude=(), extensions=(), prune=()):
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.extensions = [extension.lower().lstrip(".") for extension in extensions if extension.strip(". ")]
+        self.prune = list(prune)
+        self._include = _compile(self.include)
+        self._exclude = _compile(self.exclude)
+        self._suffixes = tuple(f".{extension}" for extension in self.extensions)
+        self._prune = _compile(self.prune)
+        self.active = bool(self.include or self.exclude or self.extensions or self.prune)
+
+    @classmethod
+    def from_config(cls, config):
+        config = config or {}
+        return cls(config.get("include", ()), config.get("exclude", ()), config.get("extensions", ()), config.get("prune", ()))
+
+    def to_config(self):
+        return {"include": self.include, "exclude": self.exclude, "extensions": self.extensions, "prune": self.prune}
+
+    def __eq__(self, other):
+        return isinstance(other, PathFilter) and self.to_config() == other.to_config()
+
+    def accepts_file(self, path, name=None):
+        if not self.active:
+            return True
+        name = name if name is not None else os.path.basename(path)
+        if self._suffixes and not name.lower().endswith(self._suffixes):
+            return False
+        if self.include and not _matches(self._include, path, name):
+            return False
+        return not (self.exclude and _matches(self._exclude, path, name))
+
+    def accepts_dir(self, path, name=None):
+        if not self.prune:
+            return True
+        name = name if name is not None else os.path.basename(path)
+        return not _matches(self._prune, path, name)
+
+    def accepts_event(self, path, root, is_directory=False):
+        """Check a path reported by an event under root, including the folders above it."""
+        if not self.active:
+            return True
+        if self.prune:
+            parent = os.path.dirname(path) if not is_directory else path
+            # Walk up to the watched folder; any pruned folder on the way hides the path
+            while len(parent) > len(root) and parent.startswith(root):
+                if not self.accepts_dir(parent):
+                    return False
+                parent = os.path.dirname(parent)
+        return is_directory or self.accepts_file(path)
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+
+HistoryEntry = namedtuple("HistoryEntry", ["seq", "timestamp", "path", "size"])
+
+
+def format_entry(entry):
+    timestamp = datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    return f"File: {os.path.basename(entry.path)}, Size: {entry.size} bytes, Timestamp: {timestamp}"
+
+
+class FileHistory:
+    """Record of every file an alarm has seen.
+
+    The newest entries stay in a fixed-size ring buffer so the common case
+    (looking at what just happened) never touches the disk. Every entry is
+    also appended to an SQLite log indexed by time and path, which is paged
+    and filtered on demand instead of being loaded into memory. Pass
+    path=None to keep the log in memory only (it is still bounded on the
+    Python side, but not on the SQLite side).
+    """
+
+    def __init__(self, path="file_history.db", memory_limit=1000):
+        self.recent = deque(maxlen=memory_limit)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "seq INTEGER PRIMARY KEY, timestamp REAL NOT NULL, path TEXT NOT NULL, "
+            "name TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS history_path ON history (path)")
+        self.db.commit()
+
+        # Warm the ring buffer with the tail of the log
+        rows = self.db.execute(
+            "SELECT seq, timestamp, path, size FROM history ORDER BY seq DESC LIMIT ?", (memory_limit,)
+        ).fetchall()
+        self.recent.extend(HistoryEntry(*row) for row in reversed(rows))
+        self.total = self.db.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def __len__(self):
+        return self.total
+
+    def append(self, path, size, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO history (timestamp, path, name, size) VALUES (?, ?, ?, ?)",
+                (timestamp, path, os.path.basename(path).lower(), size),
+            )
+            self.db.commit()
+            self.total += 1
+            entry = HistoryEntry(cursor.lastrowid, timestamp, path, size)
+            self.recent.append(entry)
+        return entry
+
+    def _where(self, name, min_size, max_size, since, until, path):
+        clauses, params = [], []
+        if name:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            escaped = name.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(max_size)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if path is not None:
+            clauses.append("path = ?")
+            params.append(path)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, name=None, min_size=None, max_size=None, since=None, until=None, path=None):
+        where, params = self._where(name, min_size, max_size, since, until, path)
+        if not where:
+            return self.total
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def page(self, offset=0, limit=200, name=None, min_size=None, max_size=None, since=None, until=None, path=None):
+        """Return up to limit entries, oldest first, skipping the first offset matches."""
+        where, params = self._where(name, min_size, max_size, since, until, path)
+        with self.lock:
+            # Unfiltered pages near the end are served from the ring buffer
+            if not where and offset >= self.total - len(self.recent):
+                start = offset - (self.total - len(self.recent))
+                return list(self.recent)[start:start + limit]
+            rows = self.db.execute(
+                f"SELECT seq, timestamp, path, size FROM history{where} ORDER BY seq LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
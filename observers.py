@@ -0,0 +1,421 @@
+import itertools
+import os
+from collections import OrderedDict
+import queue
+import sys
+import threading
+import time
+
+from watchdog.observers import Observer
+from watchdog.events import (
+    EVENT_TYPE_CLOSED,
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEventHandler,
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirModifiedEvent,
+    DirMovedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+from watchdog.utils.dirsnapshot import DirectorySnapshot, DirectorySnapshotDiff
+
+from adaptive import AdaptiveInterval
+
+if sys.platform.startswith("linux"):
+    from shared_inotify import SharedInotify
+else:
+    SharedInotify = None
+
+
+BACKEND_NATIVE = "native"  # inotify / ReadDirectoryChangesW / FSEvents through watchdog's Observer
+BACKEND_POLLING = "polling"  # Periodic directory snapshots, works on any filesystem
+NATIVE_OBSERVERS = 8  # watchdog Observers native watches are spread over where there is no SharedInotify
+MAX_NATIVE_WATCHES = 64  # Without SharedInotify every native watch costs an emitter thread; more fall back to polling
+
+# Filesystems where native change notifications miss writes made by other machines
+REMOTE_FS_TYPES = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p", "ceph",
+    "glusterfs", "lustre", "gpfs", "davfs", "sshfs", "vboxsf", "prl_fs", "vmhgfs",
+}
+
+
+def _linux_fs_type(path):
+    """Return the filesystem type of the mount that contains path, or None."""
+    best_mount, best_type = "", None
+    try:
+        with open("/proc/self/mountinfo") as mountinfo:
+            for line in mountinfo:
+                fields, _, tail = line.partition(" - ")
+                mount_point = fields.split()[4].replace("\\040", " ")
+                inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+                if inside and len(mount_point) >= len(best_mount):
+                    best_mount, best_type = mount_point, tail.split()[0]
+    except (OSError, IndexError):
+        return None
+    return best_type
+
+
+def _windows_is_remote(path):
+    if path.startswith(("\\\\", "//")):
+        return True  # UNC path
+    import ctypes
+    drive = os.path.splitdrive(path)[0] + "\\"
+    return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+
+
+def detect_backend(path):
+    """Pick the native backend for local folders and polling for network/FUSE mounts."""
+    path = os.path.realpath(path)
+    try:
+        if sys.platform.startswith("linux"):
+            fs_type = _linux_fs_type(path)
+            if fs_type is None:
+                return BACKEND_POLLING
+            if fs_type in REMOTE_FS_TYPES or fs_type == "fuse" or fs_type.startswith("fuse."):
+                return BACKEND_POLLING
+            return BACKEND_NATIVE
+        if sys.platform == "win32":
+            return BACKEND_POLLING if _windows_is_remote(path) else BACKEND_NATIVE
+    except Exception as e:
+        print(f"Could not detect filesystem type for {path}: {e}")
+        return BACKEND_POLLING
+    return BACKEND_NATIVE
+
+
+class Watch:
+    """One watched folder and the handler its events are routed to."""
+
+    def __init__(self, watch_id, path, handler, recursive, backend, interval, path_filter=None):
+        self.watch_id = watch_id
+        self.path = path
+        self.handler = handler
+        self.recursive = recursive
+        self.backend = backend
+        self.path_filter = path_filter if path_filter is not None and path_filter.active else None
+        self.native_watch = None  # watchdog ObservedWatch for native watches
+        self.native_observer = None  # watchdog Observer that owns native_watch
+        self.snapshot = None  # Taken on the first poll; no events until then
+        self.interval = interval  # AdaptiveInterval for polling watches
+        self.next_poll = 0.0  # time.monotonic() deadline of the next poll
+
+    def accepts(self, event):
+        """Whether an event passes the watch's filter (moves count if either end does)."""
+        if self.path_filter is None:
+            return True
+        root = self.path.rstrip(os.sep)
+        if self.path_filter.accepts_event(event.src_path, root, event.is_directory):
+            return True
+        dest_path = getattr(event, "dest_path", "")
+        return bool(dest_path) and self.path_filter.accepts_event(dest_path, root, event.is_directory)
+
+    def listdir(self, dir_path):
+        """os.scandir for DirectorySnapshot that skips pruned folders and excluded files without stat'ing them."""
+        entries = os.scandir(dir_path)
+        if self.path_filter is None:
+            return entries
+        with entries:
+            return [
+                entry for entry in entries
+                if (self.path_filter.accepts_dir(entry.path, entry.name) if entry.is_dir(follow_symlinks=False)
+                    else self.path_filter.accepts_file(entry.path, entry.name))
+            ]
+
+
+class _RouteToWatch(FileSystemEventHandler):
+    """Forward events from the native observer into the shared dispatch queue."""
+
+    def __init__(self, events, watch):
+        self.events = events
+        self.watch = watch
+
+    def dispatch(self, event):
+        # Filtered here, on the emitter thread, so excluded files never reach the queue
+        if self.watch.accepts(event):
+            self.events.put((self.watch.watch_id, event))
+
+
+class EventCoalescer:
+    """Merge bursts of modified events per path before they reach the handlers.
+
+    A writer appending to a segment fires a modified event for every write.
+    The first modified event for a (watch, path) pair is held for `window`
+    seconds and any further ones in that time are dropped, so a handler sees
+    at most one modified event per path per window. Created, deleted, moved
+    and closed events are delivered immediately, after any modified event
+    still held for the same path, so ordering per path is preserved.
+    """
+
+    BARRIER_TYPES = {EVENT_TYPE_CREATED, EVENT_TYPE_DELETED, EVENT_TYPE_MOVED, EVENT_TYPE_CLOSED}
+
+    def __init__(self, window=0.5):
+        self.window = window
+        self.pending = OrderedDict()  # (watch id, path) -> (deadline, event); deadlines are in insertion order
+        self.raw_events = 0  # Events received from the emitters
+        self.delivered_events = 0  # Events handed to handlers after coalescing
+
+    def add(self, watch_id, event):
+        """Take one raw event and return the (watch id, event) pairs ready to deliver now."""
+        self.raw_events += 1
+        key = (watch_id, event.src_path)
+        if event.event_type == EVENT_TYPE_MODIFIED and self.window > 0:
+            if key not in self.pending:
+                self.pending[key] = (time.monotonic() + self.window, event)
+            return []
+
+        ready = []
+        if event.event_type in self.BARRIER_TYPES and key in self.pending:
+            ready.append((watch_id, self.pending.pop(key)[1]))
+        ready.append((watch_id, event))
+        self.delivered_events += len(ready)
+        return ready
+
+    def due(self):
+        """Return held events whose window has expired."""
+        ready = []
+        now = time.monotonic()
+        while self.pending:
+            key, (deadline, event) = next(iter(self.pending.items()))
+            if deadline > now:
+                break
+            del self.pending[key]
+            ready.append((key[0], event))
+        self.delivered_events += len(ready)
+        return ready
+
+    def next_timeout(self):
+        """Seconds until the next held event is due, or None if nothing is held."""
+        if not self.pending:
+            return None
+        deadline, _ = next(iter(self.pending.values()))
+        return max(0.0, deadline - time.monotonic())
+
+
+class SharedObserver:
+    """Watch the folders of every alarm with a fixed number of threads.
+
+    watchdog's observers start one emitter thread per scheduled path, so each
+    alarm used to cost its own thread(s). Here a single poller thread snapshots
+    every polling watch in turn and a single dispatcher thread routes the
+    resulting events to the handler of the watch that produced them. Adding or
+    removing a watch never restarts monitoring for the other alarms.
+
+    Each polling watch has its own adaptive interval: it is polled every
+    min_interval seconds while files in it are changing and backs off towards
+    max_interval while it is idle.
+
+    Events pass through an EventCoalescer on the dispatcher thread, so a
+    burst of modified events for one file reaches its handler only once per
+    coalescing window.
+
+    On Linux all native watches share one inotify fd and one reader thread
+    (shared_inotify.SharedInotify), whose events are funnelled into the same
+    dispatcher, so the thread count stays the same however many alarms run.
+    Elsewhere native watches go through a few shared watchdog Observers,
+    which start an emitter thread per watch, so at most MAX_NATIVE_WATCHES
+    are native there and the rest fall back to polling.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=10.0, coalesce_window=0.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.coalescer = EventCoalescer(coalesce_window)  # Only used from the dispatcher thread
+        self._watches = {}  # watch id -> Watch
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._poller = None
+        self._dispatcher = None
+        self._inotify = None  # SharedInotify, created with the first native watch on Linux
+        self._natives = []  # Shared watchdog Observers, created as native watches are added elsewhere
+        self._native_turn = itertools.count()
+
+    def is_alive(self):
+        return self._poller is not None and self._poller.is_alive()
+
+    def start(self):
+        with self._start_lock:  # Alarms can be started from several threads at once
+            if self.is_alive():
+                return
+            self._stopped.clear()
+            self._poller = threading.Thread(target=self._poll_loop, name="SharedObserverPoller", daemon=True)
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="SharedObserverDispatcher", daemon=True)
+            self._poller.start()
+            self._dispatcher.start()
+        with self._lock:
+            if self._inotify is not None:
+                self._inotify.start()
+            for native in self._natives:
+                if not native.is_alive():
+                    native.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self._events.put(None)  # Unblock the dispatcher
+        with self._lock:
+            inotify, self._inotify = self._inotify, None
+            natives, self._natives = self._natives, []  # watchdog observers cannot be restarted
+            for watch in self._watches.values():
+                if watch.backend == BACKEND_NATIVE:
+                    watch.backend = BACKEND_POLLING  # Their kernel watches go away with the fd
+        if inotify is not None:
+            inotify.close()
+        for native in natives:
+            if native.is_alive():
+                native.stop()
+                native.join()
+
+    def join(self, timeout=None):
+        for thread in (self._poller, self._dispatcher):
+            if thread is not None and thread.is_alive():
+                thread.join(timeout)
+
+    def schedule(self, handler, path, recursive=True, backend=BACKEND_POLLING, path_filter=None):
+        """Start routing events under path to handler and return the watch id.
+
+        A native watch that cannot be set up (e.g. the inotify watch limit is
+        reached) falls back to polling; check backend_of() for the result.
+        Events for paths rejected by path_filter (a filters.PathFilter) are
+        dropped before they are queued, and polling never lists pruned folders.
+        """
+        interval = AdaptiveInterval(self.min_interval, self.max_interval)
+        watch = Watch(next(self._ids), path, handler, recursive, backend, interval, path_filter)
+        if backend == BACKEND_NATIVE:
+            try:
+                # Outside self._lock: a recursive watch can take a while to set up on a big tree
+                if SharedInotify is not None:
+                    self._shared_inotify().add(watch)
+                else:
+                    native = self._native_observer()
+                    watch.native_watch = native.schedule(_RouteToWatch(self._events, watch), path, recursive=recursive)
+                    watch.native_observer = native
+            except Exception as e:
+                print(f"Native watch failed for {path}, falling back to polling: {e}")
+                watch.backend = BACKEND_POLLING
+        with self._lock:
+            self._watches[watch.watch_id] = watch
+        self._wakeup.set()  # Take the baseline snapshot right away
+        return watch.watch_id
+
+    def _shared_inotify(self):
+        with self._lock:
+            if self._inotify is None:
+                self._inotify = SharedInotify(self._events)
+                if self.is_alive():
+                    self._inotify.start()
+            return self._inotify
+
+    def _native_observer(self):
+        # Deal native watches round-robin over the shared Observers, creating them as needed
+        with self._lock:
+            native_watches = sum(1 for watch in self._watches.values() if watch.native_observer is not None)
+            if native_watches >= MAX_NATIVE_WATCHES:
+                raise OSError(f"already {native_watches} native watches")
+            turn = next(self._native_turn) % NATIVE_OBSERVERS
+            if turn >= len(self._natives):
+                native = Observer()
+                if self.is_alive():
+                    native.start()
+                self._natives.append(native)
+                return native
+            return self._natives[turn]
+
+    def unschedule(self, watch_id):
+        with self._lock:
+            watch = self._watches.pop(watch_id, None)
+            inotify = self._inotify
+        if watch is not None and watch.backend == BACKEND_NATIVE and inotify is not None:
+            inotify.remove(watch_id)
+        if watch is not None and watch.native_observer is not None:
+            try:
+                watch.native_observer.unschedule(watch.native_watch)
+            except KeyError:
+                pass  # Emitter already gone, e.g. the folder was deleted
+
+    def backend_of(self, watch_id):
+        with self._lock:
+            watch = self._watches.get(watch_id)
+            return watch.backend if watch else None
+
+    def watch_count(self):
+        with self._lock:
+            return len(self._watches)
+
+    def _poll_loop(self):
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            with self._lock:
+                watches = [watch for watch in self._watches.values() if watch.backend == BACKEND_POLLING]
+            for watch in watches:
+                if self._stopped.is_set():
+                    return
+                if watch.next_poll <= time.monotonic():
+                    active = self._poll(watch)
+                    watch.next_poll = time.monotonic() + watch.interval.update(active)
+
+            # Sleep until the next watch is due, or until a watch is added
+            next_poll = min((watch.next_poll for watch in watches), default=time.monotonic() + self.max_interval)
+            self._wakeup.wait(max(0.0, next_poll - time.monotonic()))
+
+    def _poll(self, watch):
+        """Snapshot one watch, queue its events and return whether any file changed."""
+        try:
+            new_snapshot = DirectorySnapshot(watch.path, recursive=watch.recursive, listdir=watch.listdir)
+        except OSError:
+            return False  # Folder is unreachable right now, try again later
+
+        if watch.snapshot is None:
+            watch.snapshot = new_snapshot
+            return False
+
+        diff = DirectorySnapshotDiff(watch.snapshot, new_snapshot)
+        watch.snapshot = new_snapshot
+
+        events = []
+        events.extend(FileDeletedEvent(path) for path in diff.files_deleted)
+        events.extend(FileModifiedEvent(path) for path in diff.files_modified)
+        events.extend(FileCreatedEvent(path) for path in diff.files_created)
+        events.extend(FileMovedEvent(src, dest) for src, dest in diff.files_moved)
+        events.extend(DirDeletedEvent(path) for path in diff.dirs_deleted)
+        events.extend(DirModifiedEvent(path) for path in diff.dirs_modified)
+        events.extend(DirCreatedEvent(path) for path in diff.dirs_created)
+        events.extend(DirMovedEvent(src, dest) for src, dest in diff.dirs_moved)
+        for event in events:
+            self._events.put((watch.watch_id, event))
+        return bool(diff.files_modified or diff.files_created or diff.files_moved or diff.files_deleted)
+
+    def event_counts(self):
+        """Return (raw events seen, events delivered to handlers after coalescing)."""
+        return self.coalescer.raw_events, self.coalescer.delivered_events
+
+    def _dispatch_loop(self):
+        while True:
+            try:
+                item = self._events.get(timeout=self.coalescer.next_timeout())
+            except queue.Empty:
+                item = ()  # A held event is due
+            if item is None or self._stopped.is_set():
+                return
+            ready = self.coalescer.add(*item) if item else []
+            ready.extend(self.coalescer.due())
+            for watch_id, event in ready:
+                self._deliver(watch_id, event)
+
+    def _deliver(self, watch_id, event):
+        with self._lock:
+            watch = self._watches.get(watch_id)
+        if watch is None:
+            return  # Alarm was removed after the event was queued
+        try:
+            watch.handler.dispatch(event)
+        except Exception as e:
+            print(f"Error handling {event.src_path}: {e}")
@@ -0,0 +1,138 @@
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+
+
+def intern_dir(dir_path):
+    """Share one string object per directory between all the records that live in it."""
+    return sys.intern(dir_path)
+
+
+class FileRecord:
+    """State of one file an alarm is tracking.
+
+    Replaces the {"name", "size", "timer"} dict plus the parallel size dict
+    of FileChangeHandler. The directory is interned, so thousands of files
+    in one folder share a single prefix string; the full path is only kept
+    as the key of the table the record lives in.
+    """
+
+    __slots__ = ("folder", "name", "size", "mtime", "stable_samples", "timer", "checks")
+
+    def __init__(self, file_path, size, mtime=None, timer=None):
+        folder, self.name = os.path.split(file_path)
+        self.folder = intern_dir(folder)
+        self.size = size
+        self.mtime = mtime  # st_mtime_ns at the last sample, None if unknown
+        self.stable_samples = 0  # Consecutive size checks that saw no change
+        self.timer = timer  # Pending size check, or None
+        self.checks = 0  # Size checks scheduled so far; only the latest one may act
+
+    @property
+    def path(self):
+        return os.path.join(self.folder, self.name)
+
+
+class FileTable(MutableMapping):
+    """{path: (size, last_change_time)} mapping stored column-wise.
+
+    Drop-in replacement for the files_info dict of tuples: sizes and change
+    times live in two typed arrays and the dict only maps each path to its
+    row, so a file costs a dict slot and 16 bytes of column data instead of
+    a tuple, an int and a float object. Rows of removed files are reused.
+
+    ordered_paths() returns the paths sorted by last change time. It is
+    sorted once on first use and then kept in order as entries change, so
+    a GUI can show the newest files without re-sorting the whole table.
+    """
+
+    def __init__(self, items=()):
+        self.rows = {}  # path -> row in the columns
+        self.sizes = array("q")
+        self.times = array("d")
+        self.free_rows = []
+        self.order = []  # Paths sorted by (last change time, row), see ordered_paths()
+        self.ordered = False  # Whether self.order is being kept up to date
+        self.update(items)
+
+    def __getitem__(self, file_path):
+        row = self.rows[file_path]
+        return self.sizes[row], self.times[row]
+
+    def __setitem__(self, file_path, info):
+        row = self.rows.get(file_path)
+        if row is None:
+            if self.free_rows:
+                row = self.free_rows.pop()
+            else:
+                row = len(self.sizes)
+                self.sizes.append(0)
+                self.times.append(0.0)
+            self.rows[file_path] = row
+            self.sizes[row], self.times[row] = info
+            if self.ordered:
+                self._order_insert(file_path)
+        elif self.ordered and info[1] != self.times[row]:
+            self._order_remove(file_path)  # Found by its old time, so before the columns change
+            self.sizes[row], self.times[row] = info
+            self._order_insert(file_path)
+        else:
+            self.sizes[row], self.times[row] = info
+
+    def __delitem__(self, file_path):
+        if self.ordered and file_path in self.rows:
+            self._order_remove(file_path)
+        self.free_rows.append(self.rows.pop(file_path))
+
+    def __contains__(self, file_path):
+        return file_path in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def items(self):
+        sizes, times = self.sizes, self.times
+        return [(file_path, (sizes[row], times[row])) for file_path, row in self.rows.items()]
+
+    def clear(self):
+        self.rows.clear()
+        self.sizes = array("q")
+        self.times = array("d")
+        self.free_rows = []
+        # Same list object, so views holding it see the table empty; refilled by one sort on next use
+        self.order.clear()
+        self.ordered = False
+
+    def ordered_paths(self):
+        """Return the paths sorted by last change time, oldest first.
+
+        The list is live and must not be modified: it is sorted once on the
+        first call (and on the first call after clear(), so a bulk reload
+        costs one sort instead of one insert per file) and from then on every
+        insert, change or removal moves a single path found with bisect.
+        """
+        if not self.ordered:
+            self.order[:] = sorted(self.rows, key=self._order_key)
+            self.ordered = True
+        return self.order
+
+    def _order_key(self, file_path):
+        # The row breaks ties, so every path has a unique position to bisect for
+        row = self.rows[file_path]
+        return self.times[row], row
+
+    def _order_insert(self, file_path):
+        order = self.order
+        key = self._order_key(file_path)
+        if not order or self._order_key(order[-1]) <= key:
+            order.append(file_path)  # The usual case: the file just changed, so it is the newest
+        else:
+            order.insert(bisect_right(order, key, key=self._order_key), file_path)
+
+    def _order_remove(self, file_path):
+        del self.order[bisect_left(self.order, self._order_key(file_path), key=self._order_key)]
@@ -0,0 +1,323 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from records import FileTable
+
+
+class IncrementalScanner:
+    """Keep a files_info dict ({path: (size, last_change_time)}) in sync with a folder tree.
+
+    A directory's mtime only changes when entries are added, removed or
+    renamed, so directories whose mtime is unchanged since the last pass are
+    not listed again. Each pass costs one stat per directory, plus a stat for
+    files in changed directories and for "hot" files that changed recently
+    (a file growing in place does not touch its directory's mtime). Every
+    `full_scan_every` passes, and at least every `full_scan_interval`
+    seconds (hot_window by default), the whole tree is listed again as a
+    safety net, which also catches idle files that start growing again.
+    The time limit matters when the caller backs off its poll interval:
+    30 passes of 30 s would leave such a file unnoticed for 15 minutes.
+
+    With workers > 1 the tree is walked one level at a time and the directory
+    listings and file stats of each level are fanned out over a thread pool,
+    which hides the round-trip time of network shares. Results are merged on
+    the calling thread in sorted path order, so files_info and the returned
+    lists come out the same whatever the number of workers.
+
+    A path_filter (filters.PathFilter) is applied while listing: pruned
+    folders are never entered and excluded files are never stat'ed.
+    """
+
+    # Directory mtimes closer than this to "now" may still change within the
+    # same timestamp tick (coarse on network shares), so they are not trusted.
+    RACY_MTIME_WINDOW = 2.0
+    STAT_CHUNK = 64  # Files stated per pool task; keeps task overhead low in large folders
+
+    def __init__(self, hot_window=60, full_scan_every=30, workers=1, path_filter=None, full_scan_interval=None):
+        self.hot_window = hot_window
+        self.full_scan_every = full_scan_every
+        self.full_scan_interval = hot_window if full_scan_interval is None else full_scan_interval
+        self.last_full_scan = None  # time.monotonic() of the last full listing
+        self.workers = workers  # Threads used for listing and stat calls; 1 scans serially
+        self.path_filter = path_filter if path_filter is not None and path_filter.active else None
+        self.pool = None
+        self.root = None
+        self.dirs = {}  # dir path -> [mtime_ns or None, set of file paths, set of subdir paths]
+        self.passes = 0
+
+    def reset(self):
+        self.root = None
+        self.dirs = {}
+        self.passes = 0
+
+    def export_state(self, files_info):
+        """Return the directory listings and files_info as a JSON-able dict for a snapshot."""
+        dirs = []
+        for dir_path, (mtime, file_paths, subdir_paths) in self.dirs.items():
+            files = [[os.path.basename(path), *files_info[path]] for path in sorted(file_paths) if path in files_info]
+            dirs.append([dir_path, mtime, files, sorted(os.path.basename(path) for path in subdir_paths)])
+        filter_config = self.path_filter.to_config() if self.path_filter else None
+        return {"root": self.root, "filter": filter_config, "dirs": dirs}
+
+    def restore_state(self, state, folder, files_info):
+        """Reload export_state() output so the next scan only picks up what changed since.
+
+        Returns False (and leaves everything alone) if state is for another folder or filter.
+        """
+        filter_config = self.path_filter.to_config() if self.path_filter else None
+        if not state or state.get("root") != folder or state.get("filter") != filter_config:
+            return False
+        self.reset()
+        self.root = folder
+        files_info.clear()
+        for dir_path, mtime, files, subdir_names in state["dirs"]:
+            file_paths = set()
+            for name, size, last_change_time in files:
+                file_path = os.path.join(dir_path, name)
+                files_info[file_path] = (size, last_change_time)
+                file_paths.add(file_path)
+            subdir_paths = {os.path.join(dir_path, name) for name in subdir_names}
+            self.dirs[dir_path] = [mtime, file_paths, subdir_paths]
+        self.passes = 0  # Full pass first: files that grew while we were down have an unchanged directory mtime
+        return True
+
+    def set_filter(self, path_filter):
+        """Use a new filter; the next scan lists everything again, since excluded parts were never listed.
+
+        files_info is kept: files the new filter drops come back as removed,
+        newly included ones as added and the rest stay quiet.
+        """
+        path_filter = path_filter if path_filter is not None and path_filter.active else None
+        if path_filter != self.path_filter:
+            self.path_filter = path_filter
+            self.dirs = {}
+            self.passes = 0
+
+    def set_workers(self, workers):
+        workers = max(1, workers)
+        if workers != self.workers:
+            self.close()  # The next parallel pass starts a pool of the new size
+            self.workers = workers
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def scan(self, folder, files_info):
+        """Update files_info in place and return (added, changed, removed) path lists."""
+        added, changed, removed = [], [], []
+        if folder != self.root:
+            self.reset()
+            self.root = folder
+            removed.extend(sorted(files_info))
+            files_info.clear()
+
+        # No listings but known files: the filter changed, so whatever this pass does not see is gone
+        unseen = set(files_info) if not self.dirs and files_info else None
+        full_scan = (
+            self.passes % self.full_scan_every == 0
+            or self.last_full_scan is None
+            or time.monotonic() - self.last_full_scan >= self.full_scan_interval
+        )
+        if full_scan:
+            self.last_full_scan = time.monotonic()
+        self.passes += 1
+        now = time.time()
+
+        level = [folder]
+        while level:
+            level.sort()
+            listings = self._map(self._list_dir, [(dir_path, full_scan) for dir_path in level])
+
+            next_level = []
+            to_stat = []  # (file path, DirEntry or None)
+            for dir_path, listing in zip(level, listings):
+                if listing is None:
+                    self._forget_dir(dir_path, files_info, removed)
+                    continue
+
+                dir_mtime, entries, subdir_paths = listing
+                record = self.dirs.get(dir_path)
+                if entries is None:
+                    # Listing is unchanged; only re-stat files that were recently growing
+                    for file_path in sorted(record[1]):
+                        if now - files_info[file_path][1] <= self.hot_window:
+                            to_stat.append((file_path, None))
+                    next_level.extend(record[2])
+                    continue
+
+                entries.sort(key=lambda entry: entry.path)
+                to_stat.extend((entry.path, entry) for entry in entries)
+                file_paths = {entry.path for entry in entries}
+                if record is not None:
+                    for file_path in sorted(record[1] - file_paths):
+                        if files_info.pop(file_path, None) is not None:
+                            removed.append(file_path)
+                    for subdir_path in sorted(record[2] - subdir_paths):
+                        self._forget_dir(subdir_path, files_info, removed)
+
+                trusted_mtime = dir_mtime if now - dir_mtime / 1e9 > self.RACY_MTIME_WINDOW else None
+                self.dirs[dir_path] = [trusted_mtime, file_paths, subdir_paths]
+                next_level.extend(subdir_paths)
+
+            chunks = [to_stat[i:i + self.STAT_CHUNK] for i in range(0, len(to_stat), self.STAT_CHUNK)]
+            for chunk, sizes in zip(chunks, self._map(self._stat_chunk, chunks)):
+                for (file_path, _), size in zip(chunk, sizes):
+                    self._record_size(file_path, size, files_info, now, added, changed)
+                    if unseen is not None:
+                        unseen.discard(file_path)
+            level = next_level
+
+        if unseen:
+            for file_path in sorted(unseen):
+                del files_info[file_path]
+                removed.append(file_path)
+        return added, changed, removed
+
+    def _map(self, func, items):
+        if self.workers <= 1 or len(items) < 2:
+            return [func(item) for item in items]
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="ScanPool")
+        return list(self.pool.map(func, items))
+
+    def _list_dir(self, job):
+        """Stat one directory and list it unless its mtime is unchanged. Runs on the pool.
+
+        Returns None if the directory is gone, (mtime, None, None) if the
+        previous listing is still valid, else (mtime, file entries, subdir paths).
+        """
+        dir_path, full_scan = job
+        try:
+            dir_mtime = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return None
+
+        record = self.dirs.get(dir_path)  # Only written by the merging thread between levels
+        if record is not None and record[0] == dir_mtime and not full_scan:
+            return dir_mtime, None, None
+
+        path_filter = self.path_filter
+        file_entries = []
+        subdir_paths = set()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if path_filter is None or path_filter.accepts_dir(entry.path, entry.name):
+                                subdir_paths.add(entry.path)
+                        elif entry.is_file():
+                            if path_filter is None or path_filter.accepts_file(entry.path, entry.name):
+                                file_entries.append(entry)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return dir_mtime, file_entries, subdir_paths
+
+    def _stat_chunk(self, chunk):
+        sizes = []
+        for file_path, entry in chunk:
+            try:
+                sizes.append(entry.stat().st_size if entry is not None else os.path.getsize(file_path))
+            except OSError:
+                sizes.append(0)
+        return sizes
+
+    def _record_size(self, file_path, size, files_info, now, added, changed):
+        previous = files_info.get(file_path)
+        if previous is None:
+            files_info[file_path] = (size, now)
+            added.append(file_path)
+        elif size != previous[0]:
+            files_info[file_path] = (size, now)
+            changed.append(file_path)
+
+    def _forget_dir(self, dir_path, files_info, removed):
+        record = self.dirs.pop(dir_path, None)
+        if record is None:
+            return
+        for file_path in sorted(record[1]):
+            if files_info.pop(file_path, None) is not None:
+                removed.append(file_path)
+        for subdir_path in sorted(record[2]):
+            self._forget_dir(subdir_path, files_info, removed)
+
+
+class ScanWorker(threading.Thread):
+    """Scan a folder on a background thread and hand diff batches to the GUI thread.
+
+    The worker keeps its own files_info table and puts lists of
+    (path, (size, last_change_time)) pairs on a bounded queue, with None
+    in place of the tuple for removed files. The GUI drains the queue with
+    apply_updates() from an after() callback, so Tk widgets are only touched
+    from the main loop and a slow scan never blocks it.
+    """
+
+    def __init__(self, folder, interval, batch_size=500, max_queued_batches=64, workers=1):
+        super().__init__(daemon=True)
+        self.folder = folder
+        self.interval = interval  # Seconds between passes, can be updated from the GUI thread
+        self.batch_size = batch_size
+        self.updates = queue.Queue(maxsize=max_queued_batches)
+        self.scanner = IncrementalScanner(workers=workers)
+        self.files_info = FileTable()
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            added, changed, removed = self.scanner.scan(self.folder, self.files_info)
+            batch = []
+            for file_path in added + changed:
+                batch.append((file_path, self.files_info[file_path]))
+                if len(batch) >= self.batch_size:
+                    self.emit(batch)
+                    batch = []
+            for file_path in removed:
+                batch.append((file_path, None))
+                if len(batch) >= self.batch_size:
+                    self.emit(batch)
+                    batch = []
+            if batch:
+                self.emit(batch)
+            self.stop_event.wait(self.interval)
+        self.scanner.close()
+
+    def emit(self, batch):
+        # Block while the GUI catches up, but give up once the worker is stopped
+        while not self.stop_event.is_set():
+            try:
+                self.updates.put(batch, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def apply_updates(self, files_info, max_batches=10):
+        """Merge at most max_batches pending batches into files_info (GUI thread only).
+
+        Returns (new file paths, whether anything changed).
+        """
+        new_paths = []
+        changed = False
+        for _ in range(max_batches):
+            try:
+                batch = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            for file_path, info in batch:
+                if info is None:
+                    files_info.pop(file_path, None)
+                else:
+                    if file_path not in files_info:
+                        new_paths.append(file_path)
+                    files_info[file_path] = info
+        return new_paths, changed
@@ -0,0 +1,306 @@
+"""
+Run alarms in several worker processes instead of one.
+
+Every watchdog handler of a MonitorEngine runs in one Python process, so the
+GIL serializes event handling for all alarms. ShardedEngine is a drop-in
+MonitorEngine that spreads the alarms over N worker processes. Each worker
+runs its own MonitorEngine, with its own observers and stability timers, and
+only sends compact batches back over a pipe:
+
+    ("update", [(alarm id, file name, changing)] in order, [(path, size, time)], raw events, handled events)
+    ("started", request id, {alarm id: (startup seconds, backend)})
+    ("saved", {folder: alarm state})
+
+The GUI process keeps the alarm dicts, the file history and the saved alarm
+state, so a worker can be given any alarm and nothing is lost when the
+number of workers changes.
+"""
+import itertools
+import multiprocessing
+import signal
+import threading
+import time
+
+from engine import HISTORY_FILE, STATE_FILE, MonitorEngine
+
+
+STATE_FLUSH_INTERVAL = 0.1  # Seconds a worker batches state changes and history entries before sending them
+START_TIMEOUT = 120.0  # Seconds to wait for a worker to start a batch of alarms
+
+
+class _Outbox:
+    """Worker side of the pipe: collects state changes and history entries and sends them in batches.
+
+    State changes are kept in order, so a file that starts and stops
+    growing within one flush still reaches the GUI process as two
+    transitions; only repeats of an alarm's previous state are dropped.
+    A burst of changes still costs one message. Also stands in for the
+    engine's FileHistory.
+    """
+
+    def __init__(self, conn, interval=STATE_FLUSH_INTERVAL):
+        self.conn = conn
+        self.interval = interval
+        self.engine = None
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()  # Replies and batches are sent from different threads
+        self.transitions = []  # (alarm id, file name, changing) since the last flush, oldest first
+        self.last_states = {}  # alarm id -> last (file name, changing) queued
+        self.history = []  # (path, size, timestamp) since the last flush
+        self.counts = (0, 0)
+        self.stopped = threading.Event()
+
+    def on_state_change(self, alarm, file_name, changing):
+        state = (file_name, changing)
+        with self.lock:
+            if self.last_states.get(alarm["id"]) != state:
+                self.last_states[alarm["id"]] = state
+                self.transitions.append((alarm["id"], *state))
+
+    def forget(self, alarm_id):
+        with self.lock:
+            self.last_states.pop(alarm_id, None)
+
+    def append(self, path, size, timestamp=None):
+        with self.lock:
+            self.history.append((path, size, time.time() if timestamp is None else timestamp))
+
+    def close(self):
+        pass  # The GUI process owns the history database
+
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+    def flush(self):
+        with self.lock:
+            transitions, self.transitions = self.transitions, []
+            history, self.history = self.history, []
+        counts = self.engine.event_counts()
+        if transitions or history or counts != self.counts:
+            self.counts = counts
+            self.send(("update", transitions, history, *counts))
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.flush()
+            except (OSError, EOFError):
+                return  # GUI process is gone
+
+
+def _worker_main(conn, engine_options):
+    """Entry point of a worker process: run alarms on request until told to shut down."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the whole process group; the GUI process stops us
+    outbox = _Outbox(conn)
+    engine = MonitorEngine(on_state_change=outbox.on_state_change, state_file=None, file_history=outbox, **engine_options)
+    outbox.engine = engine
+    flusher = threading.Thread(target=outbox.run, name="ShardOutbox", daemon=True)
+    flusher.start()
+
+    alarms = {}  # alarm id -> alarm dict in this worker
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break  # GUI process is gone
+        if message[0] == "start":
+            _, request_id, alarm_configs = message
+            new_alarms = []
+            for alarm_id, folder, backend, filters, stability, saved_state in alarm_configs:
+                alarm = engine.new_alarm(folder, backend, filters, stability)
+                alarm["id"] = alarm_id  # Keep the GUI's id so updates can be matched up
+                if saved_state:
+                    engine.alarm_states[folder] = saved_state
+                alarms[alarm_id] = alarm
+                new_alarms.append(alarm)
+            startup_times = engine.start_alarms(new_alarms)
+            outbox.send(("started", request_id, {
+                alarm_id: (seconds, alarms[alarm_id]["running_backend"]) for alarm_id, seconds in startup_times.items()
+            }))
+        elif message[0] == "stop":
+            saved = {}
+            for alarm_id in message[1]:
+                alarm = alarms.pop(alarm_id, None)
+                if alarm is not None:
+                    engine.stop_alarm(alarm)
+                    outbox.forget(alarm_id)
+                    saved[alarm["folder"]] = engine.alarm_states.get(alarm["folder"])
+            outbox.send(("saved", saved))
+        elif message[0] == "shutdown":
+            break
+
+    # Hand the state of the alarms still running back to the GUI process
+    outbox.stopped.set()
+    flusher.join()
+    for alarm in alarms.values():
+        engine.stop_alarm(alarm)
+    engine.shutdown()
+    try:
+        outbox.flush()
+        outbox.send(("saved", {alarm["folder"]: engine.alarm_states.get(alarm["folder"]) for alarm in alarms.values()}))
+    except (OSError, EOFError):
+        pass
+    conn.close()
+
+
+class _Worker:
+    """GUI-side handle of one worker process."""
+
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.load = 0  # Alarms running in this worker
+        self.counts = (0, 0)  # Last (raw, handled) event counts reported
+        self.reader = None
+
+    def send(self, message):
+        with self.send_lock:
+            self.conn.send(message)
+
+
+class ShardedEngine(MonitorEngine):
+    """MonitorEngine that runs its alarms in `workers` processes.
+
+    Alarm dicts, on_state_change, the file history and the saved alarm
+    state work as in MonitorEngine; only the watching happens elsewhere.
+    alarm["watch"] holds the index of the worker running the alarm. New
+    alarms go to the worker running the fewest.
+    """
+
+    def __init__(self, workers, on_state_change=None, history_file=HISTORY_FILE, state_file=STATE_FILE, **engine_options):
+        super().__init__(on_state_change, history_file=history_file, state_file=state_file, **engine_options)
+        self.running = {}  # alarm id -> alarm dict, for alarms started in a worker
+        self.requests = {}  # request id -> (worker, threading.Event, {alarm id: (seconds, backend)})
+        self.request_ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+        # Spawned rather than forked: the GUI process has Tk and engine threads running
+        context = multiprocessing.get_context("spawn")
+        self.workers = []
+        for index in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main, args=(child_conn, engine_options), name=f"FileMonitorShard-{index}", daemon=True
+            )
+            process.start()
+            child_conn.close()
+            worker = _Worker(index, process, parent_conn)
+            worker.reader = threading.Thread(target=self._read, args=(worker,), name=f"ShardReader-{index}", daemon=True)
+            worker.reader.start()
+            self.workers.append(worker)
+
+    def start_alarm(self, alarm):
+        if alarm["id"] not in self.start_alarms([alarm]):
+            raise RuntimeError(f"Could not start alarm for {alarm['folder']}")
+
+    def start_alarms(self, alarms, workers=None):
+        """Start alarms in the worker processes and return {alarm id: seconds its start took}."""
+        batches = {}  # worker -> alarms to start there
+        with self.lock:
+            for alarm in alarms:
+                worker = min(self.workers, key=lambda worker: worker.load)
+                worker.load += 1
+                batches.setdefault(worker, []).append(alarm)
+                # Registered before the worker is asked, as its first updates can overtake the reply
+                alarm["watch"] = worker.index
+                self.running[alarm["id"]] = alarm
+
+        pending = []
+        for worker, batch in batches.items():
+            request_id = next(self.request_ids)
+            request = (worker, threading.Event(), {})
+            with self.lock:
+                self.requests[request_id] = request
+            configs = [(
+                alarm["id"], alarm["folder"], alarm["backend"], alarm["filter"].to_config(), alarm["policy"].to_config(),
+                self.alarm_states.get(alarm["folder"]),
+            ) for alarm in batch]
+            try:
+                worker.send(("start", request_id, configs))
+            except OSError as e:
+                print(f"Worker {worker.index} is not running: {e}")
+                request[1].set()
+            pending.append((worker, batch, request_id))
+
+        startup_times = {}
+        for worker, batch, request_id in pending:
+            _, done, results = self.requests[request_id]
+            if not done.wait(START_TIMEOUT):
+                print(f"Worker {worker.index} did not start its alarms in time")
+            with self.lock:
+                del self.requests[request_id]
+                for alarm in batch:
+                    if alarm["id"] in results:
+                        startup_times[alarm["id"]], alarm["running_backend"] = results[alarm["id"]]
+                    elif self.running.pop(alarm["id"], None) is not None:
+                        alarm["watch"] = None
+                        worker.load -= 1
+        return startup_times
+
+    def stop_alarm(self, alarm):
+        if alarm["watch"] is None:
+            return
+        worker = self.workers[alarm["watch"]]
+        alarm["watch"] = None
+        alarm["running_backend"] = None
+        with self.lock:
+            self.running.pop(alarm["id"], None)
+            worker.load -= 1
+        try:
+            worker.send(("stop", [alarm["id"]]))
+        except OSError:
+            pass  # Worker already gone
+
+    def event_counts(self):
+        raw_events = sum(worker.counts[0] for worker in self.workers)
+        handled_events = sum(worker.counts[1] for worker in self.workers)
+        return raw_events, handled_events
+
+    def shutdown(self):
+        for worker in self.workers:
+            try:
+                worker.send(("shutdown",))
+            except OSError:
+                pass
+        for worker in self.workers:
+            worker.reader.join(5.0)  # Ends once the worker has sent its last state
+            worker.process.join(5.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        super().shutdown()
+
+    def _read(self, worker):
+        # One thread per worker; state changes are passed on from here like engine threads do
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "update":
+                _, transitions, history, raw_events, handled_events = message
+                worker.counts = (raw_events, handled_events)
+                for path, size, timestamp in history:
+                    self.file_history.append(path, size, timestamp)
+                for alarm_id, file_name, changing in transitions:
+                    with self.lock:
+                        alarm = self.running.get(alarm_id)
+                    if alarm is not None:
+                        self.notify(alarm, file_name, changing)
+            elif message[0] == "started":
+                _, request_id, results = message
+                with self.lock:
+                    request = self.requests.get(request_id)
+                if request is not None:
+                    request[2].update(results)
+                    request[1].set()
+            elif message[0] == "saved":
+                self.alarm_states.update((folder, state) for folder, state in message[1].items() if state)
+
+        # Worker exited; do not leave start_alarms waiting for it
+        with self.lock:
+            requests = [request for request in self.requests.values() if request[0] is worker]
+        for request in requests:
+            request[1].set()
@@ -0,0 +1,285 @@
+"""
+One inotify instance and one reader thread for all native watches (Linux).
+
+A watchdog Observer gives every scheduled path its own emitter thread, its
+own inotify instance and an InotifyBuffer thread, so native alarms used to
+cost about two threads and one of the 128 inotify instances each. Here all
+native watches share a single inotify fd: every watched directory gets one
+kernel watch descriptor, the descriptor is mapped back to the directory and
+to the watches covering it, and events are turned into watchdog events and
+routed to those watches from one thread.
+"""
+import ctypes
+import errno
+import os
+import select
+import struct
+import threading
+import time
+
+from watchdog.events import (
+    DirCreatedEvent,
+    DirDeletedEvent,
+    DirMovedEvent,
+    FileClosedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+from watchdog.observers import inotify_c
+from watchdog.observers.inotify_c import InotifyConstants as IN
+
+
+WATCH_MASK = (
+    IN.IN_MODIFY | IN.IN_ATTRIB | IN.IN_CLOSE_WRITE | IN.IN_CREATE | IN.IN_DELETE
+    | IN.IN_MOVED_FROM | IN.IN_MOVED_TO | IN.IN_DELETE_SELF | IN.IN_ONLYDIR | IN.IN_DONT_FOLLOW
+)
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+READ_SIZE = 64 * 1024
+MOVE_PAIR_WINDOW = 0.5  # Seconds a moved-from event waits for its moved-to half before it counts as a delete
+
+
+class SharedInotify:
+    """Route inotify events for many watches from one fd and one thread.
+
+    `events` is the queue the events go to, as (watch id, event) pairs;
+    only events the watch accepts (Watch.accepts) are queued. Folders the
+    watch's filter prunes get no kernel watch at all.
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.fd = inotify_c.inotify_init()
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.lock = threading.Lock()
+        self.dirs = {}  # wd -> directory path
+        self.wds = {}  # directory path -> wd
+        self.covering = {}  # wd -> {watch id: Watch} of the watches that include the directory
+        self.watch_wds = {}  # watch id -> set of wds it holds
+        self.moves = {}  # cookie -> (moved-from path, is directory, wd, deadline)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._read_loop, name="SharedInotify", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        self.stop()
+        os.close(self.fd)
+
+    def add(self, watch):
+        """Add kernel watches for watch.path (and its sub-folders if recursive); raises OSError on failure."""
+        with self.lock:
+            self.watch_wds[watch.watch_id] = set()
+        try:
+            # Outside self.lock: walking a big tree takes a while and several alarms can start at once
+            self._add_tree(watch, watch.path, top=True)
+        except OSError:
+            self.remove(watch.watch_id)
+            raise
+
+    def remove(self, watch_id):
+        with self.lock:
+            wds = self.watch_wds.pop(watch_id, set())
+            unused = []
+            for wd in wds:
+                covering = self.covering.get(wd)
+                if covering is None:
+                    continue
+                covering.pop(watch_id, None)
+                if not covering:
+                    unused.append(wd)
+                    self._forget(wd)
+        for wd in unused:
+            inotify_c.inotify_rm_watch(self.fd, wd)  # The kernel answers with IN_IGNORED, which is then a no-op
+
+    def watch_count(self):
+        with self.lock:
+            return len(self.dirs)
+
+    def _add_tree(self, watch, path, top=False):
+        # Returns the files and folders found below path (not path itself) so callers can report them as created
+        self._add_dir(watch, path)
+        found = []
+        if not watch.recursive and not top:
+            return found
+        pending = [path]
+        while pending:
+            dir_path = pending.pop()
+            try:
+                entries = list(os.scandir(dir_path))
+            except OSError:
+                if dir_path == path and top:
+                    raise
+                continue  # Removed or unreadable meanwhile
+            for entry in entries:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if watch.path_filter is not None and is_dir and not watch.path_filter.accepts_dir(entry.path, entry.name):
+                    continue
+                found.append((entry.path, is_dir))
+                if is_dir and watch.recursive:
+                    try:
+                        self._add_dir(watch, entry.path)
+                    except OSError as e:
+                        if e.errno in (errno.ENOSPC, errno.ENOMEM):
+                            raise  # Out of watches: the caller falls back to polling
+                        continue  # Removed meanwhile
+                    pending.append(entry.path)
+        return found
+
+    def _add_dir(self, watch, path):
+        wd = inotify_c.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        with self.lock:
+            if watch.watch_id not in self.watch_wds:
+                return  # Unscheduled while the tree was being walked
+            old_path = self.dirs.get(wd)
+            if old_path is not None and old_path != path:
+                self.wds.pop(old_path, None)
+            self.dirs[wd] = path
+            self.wds[path] = wd
+            self.covering.setdefault(wd, {})[watch.watch_id] = watch
+            self.watch_wds[watch.watch_id].add(wd)
+
+    def _forget(self, wd):
+        # Called with self.lock held
+        path = self.dirs.pop(wd, None)
+        if path is not None and self.wds.get(path) == wd:
+            del self.wds[path]
+        for watch_id in self.covering.pop(wd, {}):
+            self.watch_wds.get(watch_id, set()).discard(wd)
+
+    def _read_loop(self):
+        while not self.stopped.is_set():
+            try:
+                # Wakes up now and then to notice stop() and expire unpaired moves
+                readable, _, _ = select.select([self.fd], [], [], MOVE_PAIR_WINDOW / 2)
+            except (OSError, ValueError):
+                return  # fd closed
+            if readable:
+                try:
+                    data = os.read(self.fd, READ_SIZE)
+                except OSError as e:
+                    if e.errno == errno.EINTR:
+                        continue
+                    return
+                self._handle_buffer(data)
+            self._expire_moves()
+
+    def _handle_buffer(self, data):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            try:
+                self._handle_event(wd, mask, cookie, os.fsdecode(name))
+            except Exception as e:
+                print(f"Error reading inotify event: {e}")
+
+    def _handle_event(self, wd, mask, cookie, name):
+        if mask & IN.IN_Q_OVERFLOW:
+            print("inotify event queue overflowed; some file events were lost")
+            return
+        if mask & IN.IN_IGNORED:
+            with self.lock:
+                self._forget(wd)
+            return
+        with self.lock:
+            dir_path = self.dirs.get(wd)
+            covering = list(self.covering.get(wd, {}).values())
+        if dir_path is None or not covering:
+            return  # Unknown or already removed watch descriptor
+
+        if mask & IN.IN_DELETE_SELF:
+            return  # The deleted event comes from the parent folder's watch; IN_IGNORED follows
+        path = os.path.join(dir_path, name)
+        is_dir = bool(mask & IN.IN_ISDIR)
+
+        if mask & IN.IN_MOVED_FROM:
+            self.moves[cookie] = (path, is_dir, wd, time.monotonic() + MOVE_PAIR_WINDOW)
+        elif mask & IN.IN_MOVED_TO:
+            move = self.moves.pop(cookie, None)
+            if move is None:
+                self._created(covering, path, is_dir)  # Moved in from outside the watched folders
+            else:
+                self._moved(covering, move[0], path, is_dir)
+        elif mask & IN.IN_CREATE:
+            self._created(covering, path, is_dir)
+        elif mask & IN.IN_DELETE:
+            self._emit(covering, DirDeletedEvent(path) if is_dir else FileDeletedEvent(path))
+        elif is_dir:
+            return  # Attribute or content changes of a sub-folder itself
+        elif mask & IN.IN_CLOSE_WRITE:
+            self._emit(covering, FileClosedEvent(path))
+        elif mask & (IN.IN_MODIFY | IN.IN_ATTRIB):
+            self._emit(covering, FileModifiedEvent(path))
+
+    def _created(self, covering, path, is_dir):
+        if not is_dir:
+            self._emit(covering, FileCreatedEvent(path))
+            return
+        self._emit(covering, DirCreatedEvent(path))
+        for watch in covering:
+            if not watch.recursive or not watch.accepts(DirCreatedEvent(path)):
+                continue
+            try:
+                found = self._add_tree(watch, path)
+            except OSError as e:
+                print(f"Could not watch new folder {path}: {e}")
+                continue
+            # Files written before the new folder's watch was in place
+            for found_path, found_dir in found:
+                self._emit([watch], DirCreatedEvent(found_path) if found_dir else FileCreatedEvent(found_path))
+
+    def _moved(self, covering, src_path, dest_path, is_dir):
+        if is_dir:
+            # The folder's watches stay valid; only the paths they map to change
+            prefix = src_path + os.sep
+            with self.lock:
+                for wd, path in list(self.dirs.items()):
+                    if path == src_path or path.startswith(prefix):
+                        new_path = dest_path + path[len(src_path):]
+                        self.dirs[wd] = new_path
+                        if self.wds.get(path) == wd:
+                            del self.wds[path]
+                        self.wds[new_path] = wd
+        self._emit(covering, DirMovedEvent(src_path, dest_path) if is_dir else FileMovedEvent(src_path, dest_path))
+
+    def _expire_moves(self):
+        # A moved-from without its moved-to left the watched folders: report it deleted
+        now = time.monotonic()
+        for cookie, (path, is_dir, wd, deadline) in list(self.moves.items()):
+            if deadline > now:
+                continue
+            del self.moves[cookie]
+            with self.lock:
+                covering = list(self.covering.get(wd, {}).values())
+                if is_dir:
+                    prefix = path + os.sep
+                    gone = [w for w, p in self.dirs.items() if p == path or p.startswith(prefix)]
+            if is_dir:
+                for gone_wd in gone:
+                    inotify_c.inotify_rm_watch(self.fd, gone_wd)  # Its IN_IGNORED drops the mapping
+            self._emit(covering, DirDeletedEvent(path) if is_dir else FileDeletedEvent(path))
+
+    def _emit(self, watches, event):
+        for watch in watches:
+            # Filtered here, on the reader thread, so excluded files never reach the queue
+            if watch.accepts(event):
+                self.events.put((watch.watch_id, event))
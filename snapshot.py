@@ -0,0 +1,32 @@
+import gzip
+import json
+import os
+
+
+SNAPSHOT_VERSION = 1  # Bump when the layout of saved state changes; older snapshots are ignored
+
+
+def save_snapshot(data, path):
+    """Write data (a JSON-able dict) to path as gzipped JSON, replacing the old file atomically."""
+    tmp_path = f"{path}.tmp"
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as snapshot_file:
+            json.dump(dict(data, version=SNAPSHOT_VERSION), snapshot_file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save snapshot {path}: {e}")
+
+
+def load_snapshot(path):
+    """Return the dict saved by save_snapshot(), or None if there is no usable snapshot."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as snapshot_file:
+            data = json.load(snapshot_file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+    return data
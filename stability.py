@@ -0,0 +1,277 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+
+class ScheduledCheck:
+    """Handle for a pending check. Mirrors the cancel() API of threading.Timer."""
+
+    __slots__ = ("scheduler", "deadline", "callback", "args", "cancelled", "queued")
+
+    def __init__(self, scheduler, deadline, callback, args):
+        self.scheduler = scheduler
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self.queued = True
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+
+class SizeCheckScheduler:
+    """Run delayed size checks for any number of files on a single thread.
+
+    Pending checks live in a heap ordered by deadline. Cancelled checks are
+    dropped lazily when they reach the top of the heap, so rescheduling a
+    file on every size change costs a heap push instead of a new OS thread.
+    """
+
+    def __init__(self, name="SizeCheckScheduler"):
+        self.name = name
+        self._heap = []  # (deadline, seq, ScheduledCheck)
+        self._seq = itertools.count()
+        self._cancelled = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            for _, _, check in self._heap:
+                check.queued = False
+            self._heap.clear()
+            self._cancelled = 0
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def schedule(self, delay, callback, *args):
+        """Call callback(*args) after delay seconds and return a cancellable handle."""
+        check = ScheduledCheck(self, time.monotonic() + delay, callback, args)
+        with self._cond:
+            heapq.heappush(self._heap, (check.deadline, next(self._seq), check))
+            # Only wake the worker if the new check is now the earliest one
+            if self._heap[0][2] is check:
+                self._cond.notify()
+        if not self._running:
+            self.start()
+        return check
+
+    def cancel(self, check):
+        with self._cond:
+            if check.cancelled:
+                return
+            check.cancelled = True
+            if check.queued:
+                self._cancelled += 1
+                # Rebuild the heap once it is mostly dead entries
+                if self._cancelled > 1024 and self._cancelled * 2 > len(self._heap):
+                    for entry in self._heap:
+                        if entry[2].cancelled:
+                            entry[2].queued = False
+                    self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                    heapq.heapify(self._heap)
+                    self._cancelled = 0
+
+    def pending(self):
+        """Number of checks that are still waiting to run."""
+        with self._cond:
+            return sum(1 for entry in self._heap if not entry[2].cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    deadline, _, check = self._heap[0]
+                    if check.cancelled:
+                        heapq.heappop(self._heap)
+                        check.queued = False
+                        self._cancelled -= 1
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        heapq.heappop(self._heap)
+                        check.queued = False
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    return
+
+            # Run the callback outside the lock so it can reschedule itself
+            try:
+                check.callback(*check.args)
+            except Exception as e:
+                print(f"Size check failed: {e}")
+
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the process-wide scheduler shared by all alarms."""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = SizeCheckScheduler()
+        return _shared_scheduler
+
+
+class StabilityPolicy:
+    """When a file that was growing counts as finished.
+
+    A file is sampled every quiet_period seconds and is finished once
+    `samples` consecutive samples saw no change. A change is a new size or,
+    with check_mtime, a new modification time (catches writers that
+    rewrite in place or preallocate). With check_open_writers the Linux
+    /proc/*/fd tables are consulted as well: a file some process still has
+    open for writing is never finished, and one nobody has open is finished
+    after the first unchanged sample instead of waiting for all of them.
+
+    With close_write, a close-after-write event from the native observer
+    (inotify IN_CLOSE_WRITE) finishes the file at once; sampling remains
+    the fallback for polled folders and writers that never close.
+    """
+
+    def __init__(self, quiet_period=5.0, samples=1, check_mtime=False, check_open_writers=False, close_write=True):
+        if quiet_period <= 0 or samples < 1:
+            raise ValueError("Need quiet_period > 0 and samples >= 1")
+        self.quiet_period = quiet_period
+        self.samples = samples
+        self.check_mtime = check_mtime
+        self.check_open_writers = check_open_writers
+        self.close_write = close_write
+
+    @classmethod
+    def from_config(cls, config):
+        config = config or {}
+        return cls(
+            float(config.get("quiet_period", 5.0)),
+            int(config.get("samples", 1)),
+            bool(config.get("check_mtime", False)),
+            bool(config.get("check_open_writers", False)),
+            bool(config.get("close_write", True)),
+        )
+
+    def to_config(self):
+        return {
+            "quiet_period": self.quiet_period,
+            "samples": self.samples,
+            "check_mtime": self.check_mtime,
+            "check_open_writers": self.check_open_writers,
+            "close_write": self.close_write,
+        }
+
+    @property
+    def settle_time(self):
+        """Seconds without change after which a file counts as finished by sampling alone."""
+        return self.quiet_period * self.samples
+
+
+class OpenWriters:
+    """Which files are currently open for writing by some process (Linux /proc only).
+
+    Reading every process's fd table is not free, so the path -> fd map is
+    rebuilt at most once per `max_age` seconds and shared by all alarms.
+    Processes of other users are only visible when running as root; their
+    files simply look closed otherwise.
+    """
+
+    def __init__(self, max_age=1.0):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.fds = {}  # real path -> [(pid, fd)]
+        self.under = {}  # root -> paths open for writing below it, for the current scan
+        self.taken = None  # time.monotonic() of the last /proc scan
+
+    @staticmethod
+    def available():
+        return os.path.isdir("/proc/self/fd")
+
+    def refresh(self):
+        fds = {}
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            fd_dir = f"/proc/{pid}/fd"
+            try:
+                for fd in os.listdir(fd_dir):
+                    try:
+                        target = os.readlink(f"{fd_dir}/{fd}")
+                    except OSError:
+                        continue
+                    if target.startswith("/"):
+                        fds.setdefault(target, []).append((pid, fd))
+            except OSError:
+                continue  # Process exited or belongs to another user
+        self.fds = fds
+        self.taken = time.monotonic()
+
+    def _fresh(self):
+        # Called with self.lock held
+        if self.taken is None or time.monotonic() - self.taken > self.max_age:
+            self.refresh()
+            self.under = {}
+
+    @staticmethod
+    def _writable(holders):
+        for pid, fd in holders:
+            try:
+                with open(f"/proc/{pid}/fdinfo/{fd}") as fdinfo:
+                    for line in fdinfo:
+                        if line.startswith("flags:"):
+                            if (int(line.split()[1], 8) & os.O_ACCMODE) in (os.O_WRONLY, os.O_RDWR):
+                                return True
+                            break
+            except (OSError, ValueError):
+                continue
+        return False
+
+    def is_open_for_writing(self, path):
+        with self.lock:
+            self._fresh()
+            holders = self.fds.get(os.path.realpath(path), ())
+        return self._writable(holders)
+
+    def paths_under(self, root):
+        """Set of paths below root (spelled as under root, not resolved) open for writing."""
+        with self.lock:
+            self._fresh()
+            if root not in self.under:
+                real_root = os.path.join(os.path.realpath(root), "")
+                prefix = os.path.join(root, "")
+                self.under[root] = {
+                    prefix + target[len(real_root):]
+                    for target, holders in self.fds.items()
+                    if target.startswith(real_root) and self._writable(holders)
+                }
+            return self.under[root]
+
+
+_open_writers = None
+
+
+def get_open_writers():
+    """Return the shared OpenWriters, or None where /proc fd tables are not available."""
+    global _open_writers
+    with _shared_lock:
+        if _open_writers is None and OpenWriters.available():
+            _open_writers = OpenWriters()
+        return _open_writers
@@ -0,0 +1,211 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+
+
+MOUNTS_FILE = "/proc/self/mounts"
+MOUNTS_REFRESH = 30.0  # Seconds the mount table is cached for
+
+
+class StatTimeout(Exception):
+    """A stat did not finish in time, or the pool had no room to run it."""
+
+
+class MountTable:
+    """Map a path to the mount point it is on, using the kernel's mount table rather than the path itself.
+
+    Looking a path up never touches the filesystem, so it is safe for paths
+    on a hung mount. Without a mount table (other platforms) every folder
+    counts as its own mount.
+    """
+
+    def __init__(self, mounts_file=MOUNTS_FILE, refresh=MOUNTS_REFRESH):
+        self.mounts_file = mounts_file
+        self.refresh = refresh
+        self._points = []  # Mount points, longest first
+        self._read_at = None
+        self._lock = threading.Lock()
+
+    def mount_of(self, path):
+        path = os.path.abspath(path)
+        for point in self._mount_points():
+            if path == point or path.startswith(point.rstrip(os.sep) + os.sep):
+                return point
+        return os.path.dirname(path)
+
+    def _mount_points(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._read_at is None or now - self._read_at > self.refresh:
+                self._read_at = now
+                try:
+                    with open(self.mounts_file) as mounts:
+                        points = {line.split()[1] for line in mounts if len(line.split()) > 1}
+                except OSError:
+                    points = set()
+                # Spaces and the like are escaped as octal, e.g. \040
+                points = {re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), point) for point in points}
+                self._points = sorted(points, key=len, reverse=True)
+            return self._points
+
+
+class StatPool:
+    """Run file stats on a few worker threads without blocking the caller.
+
+    A stat on a hung network mount can block for minutes. submit() returns a
+    Future at once, so the event and size-check threads never wait on the
+    kernel. Concurrent requests for the same path share one stat, and the
+    job queue is bounded so a dead mount cannot pile up work.
+
+    Stats are grouped by mount point. At most `per_mount` of them run on one
+    mount at a time, so a mount that hangs holds at most that many workers
+    and the others keep serving every other mount. Once a stat has been
+    running for longer than `timeout` its mount counts as hung: new stats for
+    it fail at once with StatTimeout until the stuck one returns.
+    """
+
+    def __init__(self, workers=4, timeout=2.0, max_pending=256, per_mount=2, mounts=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.per_mount = per_mount
+        self.mounts = mounts or MountTable()
+        self._pending = deque()  # (path, mount, Future) not started yet
+        self._inflight = {}  # path -> Future of the stat currently queued or running
+        self._running = {}  # mount -> monotonic start times of the stats running on it
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _start(self):
+        # Called with self._cond held
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"StatPool-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, path):
+        """Queue os.stat(path) and return a Future for it.
+
+        Raises StatTimeout right away if the path's mount is hung or the
+        queue is full. The Future fails with FileNotFoundError and other
+        OSErrors like os.stat, or with StatTimeout if the mount went hung
+        while the stat was queued.
+        """
+        mount = self.mounts.mount_of(path)
+        with self._cond:
+            self._start()
+            future = self._inflight.get(path)
+            if future is not None:
+                return future
+            if self._is_hung(mount):
+                raise StatTimeout(f"{mount} is not answering, skipped {path}")
+            if len(self._pending) >= self.max_pending:
+                raise StatTimeout(f"Stat queue full, skipped {path}")
+            future = Future()
+            self._pending.append((path, mount, future))
+            self._inflight[path] = future
+            self._cond.notify()
+        return future
+
+    def getsize(self, path, timeout=None):
+        """Return os.path.getsize(path), raising StatTimeout if it takes longer than timeout."""
+        return self.stat(path, timeout).st_size
+
+    def stat(self, path, timeout=None):
+        """Return os.stat(path), raising StatTimeout if it takes longer than timeout."""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(path)
+        done, _ = wait([future], timeout)
+        if not done:
+            raise StatTimeout(f"Stat of {path} took longer than {timeout}s")
+        return future.result()  # Re-raises FileNotFoundError and other OSErrors
+
+    def busy(self):
+        """Number of stats queued or still running (including hung ones)."""
+        with self._cond:
+            return len(self._inflight)
+
+    def hung_mounts(self):
+        """Mount points with a stat running for longer than the timeout."""
+        with self._cond:
+            return sorted(mount for mount in self._running if self._is_hung(mount))
+
+    def _is_hung(self, mount):
+        # Called with self._cond held
+        started = self._running.get(mount)
+        return bool(started) and time.monotonic() - started[0] > self.timeout
+
+    def _next_job(self, failed):
+        """Return the oldest job whose mount has a free slot, or None; called with self._cond held.
+
+        Jobs for hung mounts are taken out and appended to failed instead:
+        their mount's slots may never free up.
+        """
+        i = 0
+        while i < len(self._pending):
+            path, mount, future = job = self._pending[i]
+            if self._is_hung(mount):
+                del self._pending[i]
+                del self._inflight[path]
+                failed.append(job)
+            elif len(self._running.get(mount, ())) < self.per_mount:
+                del self._pending[i]
+                return job
+            else:
+                i += 1
+        return None
+
+    def _run(self):
+        while True:
+            failed = []
+            with self._cond:
+                job = self._next_job(failed)
+                while job is None and not failed:
+                    # Jobs waiting for a slot are looked at again once their mount may count as hung
+                    self._cond.wait(self.timeout / 2 if self._pending else None)
+                    job = self._next_job(failed)
+                if job is not None:
+                    path, mount, future = job
+                    started = time.monotonic()
+                    self._running.setdefault(mount, []).append(started)
+            # Outside the lock: done callbacks run here
+            for failed_path, failed_mount, failed_future in failed:
+                failed_future.set_exception(StatTimeout(f"{failed_mount} is not answering, skipped {failed_path}"))
+            if job is None:
+                continue
+
+            try:
+                result, error = os.stat(path), None
+            except Exception as e:
+                result, error = None, e
+            with self._cond:
+                running = self._running[mount]
+                running.remove(started)
+                if not running:
+                    del self._running[mount]
+                if self._inflight.get(path) is future:
+                    del self._inflight[path]
+                self._cond.notify_all()  # A slot on this mount is free again
+            # Outside the lock: done callbacks run here
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_stat_pool():
+    """Return the process-wide stat pool shared by all alarms."""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = StatPool()
+        return _shared_pool
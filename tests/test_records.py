@@ -0,0 +1,52 @@
+import random
+
+from records import FileRecord, FileTable
+
+
+def by_time(table):
+    return sorted(table, key=lambda path: (table[path][1], table.rows[path]))
+
+
+def test_file_table_is_a_mapping_and_reuses_rows():
+    table = FileTable({"/a": (1, 10.0), "/b": (2, 20.0)})
+    assert table["/a"] == (1, 10.0) and len(table) == 2 and "/b" in table
+    table["/a"] = (5, 30.0)
+    assert dict(table.items()) == {"/a": (5, 30.0), "/b": (2, 20.0)}
+    del table["/b"]
+    table["/c"] = (3, 40.0)
+    assert len(table.sizes) == 2  # The row of /b was reused
+    assert dict(table) == {"/a": (5, 30.0), "/c": (3, 40.0)}
+
+
+def test_ordered_paths_follow_inserts_changes_and_deletes():
+    rng = random.Random(4)
+    table = FileTable({f"/f{i}": (i, float(rng.randrange(50))) for i in range(200)})
+    order = table.ordered_paths()
+    assert order == by_time(table)
+
+    for step in range(2000):
+        path = f"/f{rng.randrange(300)}"
+        action = rng.random()
+        if action < 0.2 and path in table:
+            del table[path]
+        else:
+            size = table[path][0] + 1 if path in table else 0
+            table[path] = (size, float(rng.randrange(50)) if action < 0.6 else table.get(path, (0, 1.0))[1])
+    assert table.ordered_paths() is order  # Live list, updated in place
+    assert order == by_time(table)
+
+
+def test_clear_empties_the_live_order_and_sorts_again_on_next_use():
+    table = FileTable({"/a": (1, 2.0), "/b": (1, 1.0)})
+    order = table.ordered_paths()
+    table.clear()
+    assert order == []
+    table.update({"/c": (1, 3.0), "/d": (1, 0.5)})
+    assert table.ordered_paths() is order
+    assert order == ["/d", "/c"]
+
+
+def test_file_record_path():
+    record = FileRecord("/mnt/dvr/cam1/seg.ts", 10)
+    assert record.path == "/mnt/dvr/cam1/seg.ts"
+    assert (record.name, record.size, record.timer, record.checks) == ("seg.ts", 10, None, 0)
@@ -0,0 +1,97 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from filters import PathFilter
+from scanner import IncrementalScanner
+
+
+def make_tree(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    # Directory mtimes older than RACY_MTIME_WINDOW are trusted, so unchanged folders are not listed again
+    old = time.time() - 60
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (old, old))
+
+
+def append(path, data=b"more"):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_idle_file_that_grows_again_is_found_by_time(tmp_path):
+    make_tree(tmp_path, ["cam/a.ts"])
+    scanner = IncrementalScanner(hot_window=0, full_scan_every=1000, full_scan_interval=0.2)
+    files_info = {}
+    scanner.scan(str(tmp_path), files_info)
+
+    # Growing in place does not touch the folder's mtime, and the file is not hot
+    append(tmp_path / "cam" / "a.ts")
+    assert scanner.scan(str(tmp_path), files_info) == ([], [], [])
+
+    time.sleep(0.25)
+    assert scanner.scan(str(tmp_path), files_info) == ([], [str(tmp_path / "cam" / "a.ts")], [])
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_scan_reports_added_changed_and_removed(tmp_path, workers):
+    make_tree(tmp_path, ["a.ts", "b.ts", "cam/c.ts", "cam/deep/d.ts"])
+    scanner = IncrementalScanner(workers=workers)
+    files_info = {}
+    paths = [str(tmp_path / name) for name in ["a.ts", "b.ts", "cam/c.ts", "cam/deep/d.ts"]]
+    assert scanner.scan(str(tmp_path), files_info) == (paths, [], [])
+    assert scanner.scan(str(tmp_path), files_info) == ([], [], [])
+
+    append(tmp_path / "a.ts")
+    os.remove(tmp_path / "b.ts")
+    shutil.rmtree(tmp_path / "cam")
+    (tmp_path / "e.ts").write_bytes(b"x")
+    assert scanner.scan(str(tmp_path), files_info) == ([str(tmp_path / "e.ts")], [paths[0]], paths[1:])
+    assert sorted(files_info) == [paths[0], str(tmp_path / "e.ts")]
+    assert files_info[paths[0]][0] == 5
+    scanner.close()
+
+
+def test_filter_change_reports_dropped_files_removed_and_kept_ones_quiet(tmp_path):
+    make_tree(tmp_path, ["a.ts", "b.txt", "skip/c.ts"])
+    scanner = IncrementalScanner()
+    files_info = {}
+    scanner.scan(str(tmp_path), files_info)
+
+    scanner.set_filter(PathFilter(extensions=["ts"], prune=["skip"]))
+    assert scanner.scan(str(tmp_path), files_info) == ([], [], [str(tmp_path / "b.txt"), str(tmp_path / "skip" / "c.ts")])
+    assert list(files_info) == [str(tmp_path / "a.ts")]
+
+    scanner.set_filter(None)
+    assert scanner.scan(str(tmp_path), files_info) == ([str(tmp_path / "b.txt"), str(tmp_path / "skip" / "c.ts")], [], [])
+
+
+def test_root_change_reports_the_old_files_removed(tmp_path):
+    make_tree(tmp_path, ["one/a.ts", "two/b.ts"])
+    scanner = IncrementalScanner()
+    files_info = {}
+    scanner.scan(str(tmp_path / "one"), files_info)
+    assert scanner.scan(str(tmp_path / "two"), files_info) == (
+        [str(tmp_path / "two" / "b.ts")], [], [str(tmp_path / "one" / "a.ts")])
+
+
+def test_restored_state_is_quiet_and_finds_growth_while_down(tmp_path):
+    make_tree(tmp_path, ["cam/a.ts", "cam/b.ts"])
+    scanner = IncrementalScanner(hot_window=0, full_scan_every=1000, full_scan_interval=1000)
+    files_info = {}
+    scanner.scan(str(tmp_path), files_info)
+    state = scanner.export_state(files_info)
+
+    # Grows in place while the monitor is down: the folder's mtime does not change
+    append(tmp_path / "cam" / "b.ts")
+    restored = IncrementalScanner(hot_window=0, full_scan_every=1000, full_scan_interval=1000)
+    assert not restored.restore_state(state, str(tmp_path / "cam"), {})
+    restored_info = {}
+    assert restored.restore_state(state, str(tmp_path), restored_info)
+    assert restored_info == files_info
+    assert restored.scan(str(tmp_path), restored_info) == ([], [str(tmp_path / "cam" / "b.ts")], [])
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from engine import SETUP_VERSION, read_setup, write_setup
+
+
+ALARMS = [
+    {"folder": "/mnt/dvr/cam1", "active": True, "backend": "native", "filters": {"extensions": ["ts"]}, "stability": None},
+    {"folder": "/mnt/dvr/cam 2", "active": False, "backend": None, "filters": None, "stability": {"quiet_period": 2.0}},
+]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "setup.json")
+    write_setup(ALARMS, path)
+    assert read_setup(path) == ALARMS
+    with open(path) as setup_file:
+        assert json.load(setup_file)["version"] == SETUP_VERSION
+    assert not (tmp_path / "setup.json.tmp").exists()
+
+
+def test_missing_file_is_an_empty_setup(tmp_path):
+    assert read_setup(str(tmp_path / "setup.json")) == []
+
+
+def test_version_1_list_is_read(tmp_path):
+    path = tmp_path / "setup.json"
+    path.write_text(json.dumps([{"folder": "/mnt/dvr/cam1", "active": True}]))
+    assert read_setup(str(path)) == [{"folder": "/mnt/dvr/cam1", "active": True}]
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "{not json",
+    json.dumps({"version": SETUP_VERSION + 1, "alarms": []}),
+    json.dumps({"version": SETUP_VERSION}),
+    json.dumps({"version": SETUP_VERSION, "alarms": {"folder": "/mnt"}}),
+    json.dumps({"version": SETUP_VERSION, "alarms": [["/mnt/dvr/cam1", True]]}),
+    json.dumps({"version": SETUP_VERSION, "alarms": [{"active": True}]}),
+    json.dumps("setup"),
+])
+def test_unreadable_setup_raises_value_error(tmp_path, content):
+    path = tmp_path / "setup.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        read_setup(str(path))
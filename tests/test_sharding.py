@@ -0,0 +1,36 @@
+from sharding import _Outbox
+
+
+class Conn:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+class Engine:
+    def event_counts(self):
+        return 0, 0
+
+
+def test_outbox_keeps_transitions_in_order():
+    conn = Conn()
+    outbox = _Outbox(conn)
+    outbox.engine = Engine()
+    alarm = {"id": 7}
+    outbox.on_state_change(alarm, "a.ts", True)
+    outbox.on_state_change(alarm, "a.ts", True)  # Repeat of the previous state
+    outbox.on_state_change(alarm, "a.ts", False)
+    outbox.on_state_change(alarm, "b.ts", True)
+    outbox.flush()
+    assert conn.sent == [("update", [(7, "a.ts", True), (7, "a.ts", False), (7, "b.ts", True)], [], 0, 0)]
+
+    # Repeats are dropped across flushes too, until the alarm is forgotten
+    outbox.on_state_change(alarm, "b.ts", True)
+    outbox.flush()
+    assert len(conn.sent) == 1
+    outbox.forget(7)
+    outbox.on_state_change(alarm, "b.ts", True)
+    outbox.flush()
+    assert conn.sent[-1][1] == [(7, "b.ts", True)]
@@ -0,0 +1,138 @@
+import os
+import threading
+
+import pytest
+
+from engine import FileChangeHandler, MonitorEngine
+from observers import BACKEND_POLLING
+from stability import SizeCheckScheduler
+from statpool import StatTimeout
+
+
+@pytest.fixture
+def handler(tmp_path):
+    changes = []
+    engine = MonitorEngine(
+        on_state_change=lambda alarm, file_name, changing: changes.append((file_name, changing)),
+        history_file=":memory:", state_file=None,
+    )
+    # Long quiet period, so the scheduler never runs a check by itself during a test
+    alarm = engine.new_alarm(str(tmp_path), BACKEND_POLLING, stability={"quiet_period": 60})
+    handler = FileChangeHandler(engine, alarm)
+    handler.changes = changes
+    yield handler
+    handler.cancel_size_checks()
+    engine.shutdown()
+
+
+def grow(path, data=b"x"):
+    with open(path, "ab") as segment:
+        segment.write(data)
+    return os.stat(path)
+
+
+def created(handler, path):
+    # on_created with its stat already done
+    handler.begin_event_stat(path)
+    handler.finish_created(grow(path), None, path)
+
+
+def modified(handler, path):
+    handler.begin_event_stat(path)
+    handler.finish_modified(grow(path), None, path)
+
+
+def test_replaced_check_does_not_finish_a_growing_file(handler, tmp_path):
+    path = str(tmp_path / "segment.ts")
+    created(handler, path)
+    record = handler.files[path]
+    stale = record.timer
+
+    # The file grows after the first check left the heap, so cancelling it does nothing
+    modified(handler, path)
+    assert record.timer is not stale
+
+    # The stale check sees no change since the modified event's sample and must not finish the file
+    handler.finish_check(os.stat(path), None, *stale.args)
+    assert handler.files.get(path) is record
+    assert handler.changes[-1] == ("segment.ts", True)
+
+    # The check that replaced it still does
+    handler.finish_check(os.stat(path), None, *record.timer.args)
+    assert path not in handler.files
+    assert handler.changes[-1] == ("segment.ts", False)
+
+
+def test_replaced_check_does_not_stat(handler, tmp_path, monkeypatch):
+    path = str(tmp_path / "segment.ts")
+    created(handler, path)
+    stale = handler.files[path].timer
+    modified(handler, path)
+
+    stats = []
+    monkeypatch.setattr(handler, "after_stat", lambda *args: stats.append(args))
+    handler.check_size(*stale.args)
+    assert stats == []
+    handler.check_size(*handler.files[path].timer.args)
+    assert len(stats) == 1
+
+
+def test_stale_check_does_not_reschedule_after_timeout(handler, tmp_path):
+    path = str(tmp_path / "segment.ts")
+    created(handler, path)
+    record = handler.files[path]
+    stale = record.timer
+    modified(handler, path)
+    current = record.timer
+
+    # A stat that timed out for the stale check must not queue a second, parallel chain of checks
+    handler.finish_check(None, StatTimeout("slow mount"), *stale.args)
+    assert record.timer is current
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = SizeCheckScheduler("TestScheduler")
+    yield scheduler
+    scheduler.stop()
+
+
+def test_scheduler_runs_checks_by_deadline_and_skips_cancelled(scheduler):
+    ran = []
+    done = threading.Event()
+    scheduler.schedule(0.15, ran.append, "late")
+    scheduler.schedule(0.05, ran.append, "early")
+    dropped = scheduler.schedule(0.1, ran.append, "cancelled")
+    scheduler.schedule(0.2, done.set)
+    dropped.cancel()
+    assert scheduler.pending() == 3
+    assert done.wait(5)
+    assert ran == ["early", "late"]
+    assert scheduler.pending() == 0
+
+
+def test_scheduler_callback_can_reschedule_itself(scheduler):
+    runs = []
+    done = threading.Event()
+
+    def check():
+        runs.append(1)
+        if len(runs) < 3:
+            scheduler.schedule(0.01, check)
+        else:
+            done.set()
+
+    scheduler.schedule(0.01, lambda: 1 / 0)  # A failing check does not stop the thread
+    scheduler.schedule(0.02, check)
+    assert done.wait(5)
+    assert len(runs) == 3
+
+
+def test_scheduler_drops_mass_cancelled_checks(scheduler):
+    checks = [scheduler.schedule(60, print) for _ in range(3000)]
+    for check in checks[:2500]:
+        check.cancel()
+    assert scheduler.pending() == 500
+    # Rebuilt once more than half the heap was dead; later cancels wait to be popped
+    assert len(scheduler._heap) == 1499
+    assert not any(check.queued for check in checks[:1501])
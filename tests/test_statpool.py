@@ -0,0 +1,68 @@
+import os
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+import statpool
+from statpool import MountTable, StatPool, StatTimeout
+
+
+@pytest.fixture
+def hung_mount(tmp_path, monkeypatch):
+    """Make stats under /hung block until the test ends, like a dead NFS server."""
+    release = threading.Event()
+    real_stat = os.stat
+
+    def stat(path, *args, **kwargs):
+        if str(path).startswith("/hung/"):
+            release.wait()
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(statpool.os, "stat", stat)
+    mounts_file = tmp_path / "mounts"
+    mounts_file.write_text("rootfs / ext4 rw 0 0\nserver:/export /hung nfs rw 0 0\n")
+    yield MountTable(str(mounts_file))
+    release.set()
+
+
+def test_mount_table_longest_prefix(tmp_path):
+    mounts_file = tmp_path / "mounts"
+    mounts_file.write_text("rootfs / ext4 rw 0 0\nsrv:/x /mnt/dvr\\040a nfs rw 0 0\n")
+    mounts = MountTable(str(mounts_file))
+    assert mounts.mount_of("/mnt/dvr a/cam1/seg.ts") == "/mnt/dvr a"
+    assert mounts.mount_of("/mnt/dvr ab/seg.ts") == "/"
+
+
+def test_queued_stats_of_a_hung_mount_fail(hung_mount, tmp_path):
+    pool = StatPool(workers=4, timeout=0.2, per_mount=2, mounts=hung_mount)
+    futures = [pool.submit(f"/hung/segment_{i}.ts") for i in range(10)]
+
+    # Two of them hold the mount's slots; the rest must not wait for those forever
+    done, not_done = wait(futures[2:], timeout=3)
+    assert not not_done
+    assert all(isinstance(future.exception(), StatTimeout) for future in done)
+    assert not any(future.done() for future in futures[:2])
+    assert pool.hung_mounts() == ["/hung"]
+    assert pool.busy() == 2
+
+    # New stats for the hung mount fail at once, other mounts are still served
+    with pytest.raises(StatTimeout):
+        pool.submit("/hung/new.ts")
+    healthy = tmp_path / "healthy.ts"
+    healthy.write_bytes(b"x" * 10)
+    assert pool.getsize(str(healthy)) == 10
+
+
+def test_stat_times_out_and_shares_one_stat_per_path(hung_mount):
+    pool = StatPool(workers=2, timeout=0.1, mounts=hung_mount)
+    with pytest.raises(StatTimeout):
+        pool.stat("/hung/segment.ts")
+    assert pool.submit("/hung/segment.ts") is pool.submit("/hung/segment.ts")
+    assert pool.busy() == 1
+
+
+def test_missing_file_raises(tmp_path):
+    pool = StatPool(workers=1)
+    with pytest.raises(FileNotFoundError):
+        pool.stat(str(tmp_path / "gone.ts"))
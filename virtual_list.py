@@ -0,0 +1,144 @@
+from tkinter import ttk
+
+
+class VirtualFileList(ttk.Frame):
+    """A Treeview that only materializes the rows currently visible.
+
+    The list is fed with an ordered sequence of keys (e.g. file paths) and a
+    row_values(key) function that returns (values, tag) for one row. Only
+    enough Treeview items to fill the widget are created; scrolling moves a
+    window over the key list and rewrites those items in place, so memory
+    and redraw cost stay flat no matter how many files are being tracked.
+    """
+
+    def __init__(self, master, columns, headings, row_values, sort_keys=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = columns
+        self.row_values = row_values
+        self.sort_keys = sort_keys or {}  # column -> function(key) used when the heading is clicked
+        self.sort_column = None
+        self.sort_reverse = False
+        self.keys = []
+        self.reverse = False  # Show self.keys back to front (newest first for a time-ordered list)
+        self.offset = 0  # Index of the first visible key
+        self.visible_rows = 1
+        self.drawn_at_end = True  # Whether the last redraw showed the end of the list
+        self.shown = {}  # row item id -> (values, tag) currently displayed
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="none")
+        for column, heading in zip(columns, headings):
+            self.tree.heading(column, text=heading, command=lambda col=column: self.toggle_sort(col))
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.tree.bind("<Prior>", lambda event: self.scroll_by(-self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.scroll_by(self.visible_rows))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0))
+        self.tree.bind("<End>", lambda event: self.scroll_to_end())
+
+    def tag_configure(self, tag, **options):
+        self.tree.tag_configure(tag, **options)
+
+    def set_items(self, keys, reverse=False):
+        """Replace the list of keys to display, keeping the current sort order.
+
+        Unless a column sort is active, a list is shown as given and not
+        copied, so a list its owner keeps in order (FileTable.ordered_paths())
+        costs nothing to show again after each change. reverse shows it back
+        to front.
+        """
+        if self.sort_column is not None:
+            self.keys = sorted(keys, key=self.sort_keys[self.sort_column], reverse=self.sort_reverse)
+            self.reverse = False
+        else:
+            self.keys = keys if isinstance(keys, list) else list(keys)
+            self.reverse = reverse
+        self.scroll_to(self.offset)
+
+    def toggle_sort(self, column):
+        if column not in self.sort_keys:
+            return
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        # A copy: the list passed to set_items() may belong to someone else
+        self.keys = sorted(self.keys, key=self.sort_keys[column], reverse=self.sort_reverse)
+        self.reverse = False
+        self.scroll_to(0)
+
+    def at_bottom(self):
+        """Whether the end of the list was in view when it was last drawn.
+
+        Taken from the last redraw rather than the current length, so it
+        still says where the user was after a live list has grown.
+        """
+        return self.drawn_at_end
+
+    def scroll_to_end(self):
+        self.scroll_to(len(self.keys))
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset):
+        self.offset = max(0, min(offset, len(self.keys) - self.visible_rows))
+        self.refresh()
+
+    def refresh(self):
+        """Redraw the visible window, touching only the rows whose content changed."""
+        if self.reverse:
+            end = len(self.keys) - self.offset
+            window = self.keys[max(0, end - self.visible_rows):max(0, end)][::-1]
+        else:
+            window = self.keys[self.offset:self.offset + self.visible_rows]
+
+        # Grow or shrink the pool of row items to match the window
+        for index in range(len(self.shown), len(window)):
+            self.tree.insert("", "end", iid=f"row{index}")
+            self.shown[f"row{index}"] = None
+        for index in range(len(window), len(self.shown)):
+            self.tree.delete(f"row{index}")
+            del self.shown[f"row{index}"]
+
+        for index, key in enumerate(window):
+            row = self.row_values(key)
+            item = f"row{index}"
+            if self.shown[item] != row:
+                values, tag = row
+                self.tree.item(item, values=values, tags=(tag,) if tag else ())
+                self.shown[item] = row
+
+        self.drawn_at_end = self.offset + self.visible_rows >= len(self.keys)
+        if self.keys:
+            total = len(self.keys)
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        visible_rows = max(1, (event.height - row_height) // row_height)  # Leave room for the heading
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.scroll_to(self.offset)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.keys)))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible_rows)
+        else:
+            self.scroll_by(int(amount))
+
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS reports small deltas
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_by(-steps * 3)